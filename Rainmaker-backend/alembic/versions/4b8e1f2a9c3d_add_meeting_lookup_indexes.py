@@ -0,0 +1,30 @@
+"""Add meeting lookup indexes
+
+Revision ID: 4b8e1f2a9c3d
+Revises: 07c958dc6059
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e1f2a9c3d'
+down_revision: Union[str, Sequence[str], None] = '07c958dc6059'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_meetings_user_workflow_created', 'meetings', ['user_id', 'workflow_id', 'created_at'], unique=False)
+    op.create_index('ix_meetings_user_status', 'meetings', ['user_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_meetings_user_status', table_name='meetings')
+    op.drop_index('ix_meetings_user_workflow_created', table_name='meetings')
@@ -41,6 +41,7 @@ class CampaignCoordinatorAgent:
     def __init__(self):
         self.active_campaigns: Dict[str, CampaignPlan] = {}
         self.executing_campaigns: Dict[str, Dict[str, Any]] = {}
+        self._workflow_plans: Dict[str, str] = {}  # workflow_id -> plan_id of its execution
         self._last_broadcast_time: Dict[str, float] = {}  # Track last broadcast time per plan
     
     def _broadcast_status_update(self, plan_id: str, execution_state: Dict[str, Any], force: bool = False):
@@ -119,7 +120,11 @@ class CampaignCoordinatorAgent:
         }
         
         # Store execution state
+        previous_state = self.executing_campaigns.get(plan_id)
+        if previous_state:
+            self._workflow_plans.pop(previous_state.get("workflow_id"), None)
         self.executing_campaigns[plan_id] = execution_state
+        self._workflow_plans[workflow_id] = plan_id
         
         # Broadcast initial status
         self._broadcast_status_update(plan_id, execution_state, force=True)
@@ -136,6 +141,17 @@ class CampaignCoordinatorAgent:
         
         return result
     
+    def find_plan_for_workflow(self, workflow_id: str) -> Optional[str]:
+        """plan_id of the campaign execution running a workflow, if any"""
+        plan_id = self._workflow_plans.get(workflow_id)
+        if plan_id and self.executing_campaigns.get(plan_id, {}).get("workflow_id") == workflow_id:
+            return plan_id
+        return None
+    
+    def release_workflow(self, workflow_id: str) -> None:
+        """Forget a finished workflow's plan; its execution state stays in executing_campaigns"""
+        self._workflow_plans.pop(workflow_id, None)
+    
     async def force_sync_workflow_state(self, plan_id: str) -> None:
         """Force sync workflow state from database and broadcast if changed"""
         if plan_id in self.executing_campaigns:
@@ -484,6 +500,7 @@ class CampaignCoordinatorAgent:
             execution_state["current_phase"] = "failed"
             execution_state["status"] = "error"
             execution_state["error"] = str(e)
+            self.release_workflow(execution_state["workflow_id"])
             self._broadcast_status_update(plan.plan_id, execution_state)
             return {
                 "status": "error",
@@ -539,6 +556,7 @@ class CampaignCoordinatorAgent:
                 execution_state["current_phase"] = "execution_complete"
                 execution_state["status"] = "completed"
                 execution_state["execution_completed_at"] = datetime.now()
+                self.release_workflow(execution_state["workflow_id"])
                 self._broadcast_status_update(plan.plan_id, execution_state, force=True)
                 return
             
@@ -579,6 +597,7 @@ class CampaignCoordinatorAgent:
                 execution_state["current_phase"] = "execution_complete"
                 execution_state["status"] = "completed"
                 execution_state["execution_completed_at"] = datetime.now()
+                self.release_workflow(execution_state["workflow_id"])
                 self._broadcast_status_update(plan.plan_id, execution_state, force=True)
                 
         except Exception as e:
@@ -586,6 +605,7 @@ class CampaignCoordinatorAgent:
             execution_state["current_phase"] = "failed"
             execution_state["status"] = "failed"
             execution_state["error"] = str(e)
+            self.release_workflow(execution_state["workflow_id"])
             self._broadcast_status_update(plan.plan_id, execution_state, force=True)
 
     # =============================================================================
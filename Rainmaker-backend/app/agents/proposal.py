@@ -3,14 +3,17 @@ Proposal Agent - Generates professional event planning proposals as PDFs
 Uses AI to intelligently process raw data and create beautiful, modern proposals
 """
 import asyncio
+import hashlib
 import json
 import os
+import uuid
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import structlog
-from jinja2 import Template
-from playwright.sync_api import sync_playwright
+from cachetools import TTLCache
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
 
 # Import Gemini service for AI processing
 import sys
@@ -36,10 +39,263 @@ try:
 except ImportError:
     gemini_service = MockGeminiService()
 
-from agents.proposal_template import MODERN_PROPOSAL_TEMPLATE
+from agents.proposal_template import render_proposal_targets
 
 logger = structlog.get_logger(__name__)
 
+try:
+    from weasyprint import HTML, CSS
+    WEASYPRINT_AVAILABLE = True
+except (ImportError, OSError):
+    # OSError when the pango/cairo system libraries are missing
+    WEASYPRINT_AVAILABLE = False
+
+# Proposals are static, JS-free HTML, so WeasyPrint renders them without a
+# browser; set PROPOSAL_PDF_ENGINE=playwright to render with Chromium instead
+PDF_ENGINE = os.getenv("PROPOSAL_PDF_ENGINE", "weasyprint").lower()
+
+if PDF_ENGINE == "weasyprint" and not WEASYPRINT_AVAILABLE:
+    logger.warning("weasyprint not available, falling back to Playwright for proposal PDFs")
+
+# Proposals of one batch generated at once; each runs a Gemini analysis and a
+# PDF render thread, and the browser pool only bounds the Chromium part
+PROPOSAL_BATCH_CONCURRENCY = int(os.getenv("PROPOSAL_BATCH_CONCURRENCY", "4"))
+
+# Content-addressed cache of Gemini analyses so regenerating a proposal for the
+# same prospect (edits, retries) skips the AI round-trip
+_ANALYSIS_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+
+
+def _analysis_cache_key(raw_data: Dict[str, Any]) -> str:
+    """Stable hash of the raw outreach data used as the analysis cache key"""
+    payload = json.dumps(raw_data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+# Static HTML-to-PDF needs no GPU, extensions or background services; dropping
+# them shrinks the Chromium process tree and per-browser memory
+_PDF_BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--no-first-run',
+    '--disable-features=TranslateUI,BackForwardCache',
+    '--mute-audio',
+    '--hide-scrollbars'
+]
+
+
+# Recycle a slot's page after this many renders to bound renderer memory growth
+_PDF_PAGE_MAX_USES = 50
+
+
+class _PdfBrowserSlot:
+    """
+    One long-lived Chromium browser pinned to its own worker thread.
+    Sync Playwright objects may only be used from the thread that created them.
+    """
+    
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="proposal-pdf")
+        self.playwright = None
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self.page_uses = 0
+    
+    def ensure_browser(self) -> Browser:
+        """Launch the browser on first use or after it disconnected"""
+        if not self.browser or not self.browser.is_connected():
+            if not self.playwright:
+                self.playwright = sync_playwright().start()
+            self.browser = self.playwright.chromium.launch(
+                headless=True,
+                args=_PDF_BROWSER_ARGS
+            )
+            self.context = None
+            self.page = None
+            logger.info("PDF browser launched")
+        return self.browser
+    
+    def ensure_page(self) -> Page:
+        """Return the slot's long-lived page, recycling it after _PDF_PAGE_MAX_USES renders"""
+        browser = self.ensure_browser()
+        if self.page is None or self.page_uses >= _PDF_PAGE_MAX_USES:
+            self.discard_page()
+            self.context = browser.new_context()
+            self.page = self.context.new_page()
+            self.page_uses = 0
+        return self.page
+    
+    def discard_page(self):
+        """Close the slot's context so the next render starts from a fresh page"""
+        if self.context:
+            try:
+                self.context.close()
+            except Exception as e:
+                logger.warning("Failed to close PDF context", error=str(e))
+        self.context = None
+        self.page = None
+    
+    def run(self, func, *args):
+        """Run func(page, *args) on the slot's page (blocking, on the slot thread)"""
+        page = self.ensure_page()
+        self.page_uses += 1
+        try:
+            return func(page, *args)
+        except Exception:
+            # A failed render may leave the page in a bad state
+            self.discard_page()
+            raise
+    
+    def warm(self):
+        """Launch the browser and open the slot's page so the renderer process is up"""
+        self.ensure_page()
+    
+    def health_check(self):
+        """Relaunch the browser if it died, otherwise ping the slot's page"""
+        if not self.browser or not self.browser.is_connected():
+            logger.warning("PDF browser disconnected, relaunching")
+            self.warm()
+        elif self.page is not None:
+            try:
+                # Evaluating in the page crosses the connection to the renderer
+                self.page.evaluate("1")
+            except Exception:
+                # A hung or crashed renderer is replaced before the next render
+                self.discard_page()
+                raise
+    
+    def close(self):
+        """Close browser and stop Playwright"""
+        try:
+            if self.browser:
+                self.browser.close()
+            if self.playwright:
+                self.playwright.stop()
+        except Exception as e:
+            logger.warning("Failed to close PDF browser", error=str(e))
+        finally:
+            self.browser = None
+            self.playwright = None
+            self.context = None
+            self.page = None
+
+
+class PdfBrowserPool:
+    """
+    Process-wide pool of Chromium browsers used for proposal PDF rendering.
+    Each slot keeps a warm browser and page, so a render is just set_content
+    plus pdf instead of a Chromium launch; the pool size caps concurrent renders.
+    """
+    
+    def __init__(self, size: int = 4):
+        self.size = size
+        self._slots = [_PdfBrowserSlot() for _ in range(size)]
+        self._available: Optional[asyncio.Queue] = None
+        self._keepalive_task: Optional[asyncio.Task] = None
+    
+    def _queue(self) -> asyncio.Queue:
+        if self._available is None:
+            self._available = asyncio.Queue()
+            for slot in self._slots:
+                self._available.put_nowait(slot)
+        return self._available
+    
+    async def run(self, func, *args):
+        """Run func(page, *args) on a pooled page on its browser's worker thread"""
+        available = self._queue()
+        slot = await available.get()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(slot.executor, slot.run, func, *args)
+        finally:
+            available.put_nowait(slot)
+    
+    async def warmup(self, keepalive_interval: float = 30.0):
+        """Pre-launch the first browser and start the keepalive health check"""
+        loop = asyncio.get_running_loop()
+        slot = self._slots[0]
+        await loop.run_in_executor(slot.executor, slot.warm)
+        
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = asyncio.create_task(self._keepalive(keepalive_interval))
+        logger.info("PDF browser pool warmed up")
+    
+    async def _keepalive(self, interval: float):
+        """Periodically health check every launched browser"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            for slot in self._slots:
+                if not slot.playwright:
+                    continue
+                try:
+                    await loop.run_in_executor(slot.executor, slot.health_check)
+                except Exception as e:
+                    logger.warning("PDF browser health check failed", error=str(e))
+    
+    async def close(self):
+        """Close every pooled browser on the thread that owns it"""
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(slot.executor, slot.close)
+            for slot in self._slots if slot.playwright
+        ))
+        logger.info("PDF browser pool closed")
+
+
+# Chromium is CPU heavy; more concurrent renders than cores only causes thrashing
+pdf_browser_pool = PdfBrowserPool(size=min(4, os.cpu_count() or 1))
+
+
+_WEASYPRINT_PAGE_CSS = "@page { size: A4; margin: 0.75in; }"
+
+
+def _uses_playwright() -> bool:
+    """Whether proposal PDFs are rendered with Chromium rather than WeasyPrint"""
+    return not (PDF_ENGINE == "weasyprint" and WEASYPRINT_AVAILABLE)
+
+
+def _render_pdf_weasyprint(html_content: str) -> bytes:
+    """Render HTML to PDF bytes with WeasyPrint (blocking)"""
+    return HTML(string=html_content).write_pdf(
+        stylesheets=[CSS(string=_WEASYPRINT_PAGE_CSS)],
+        presentational_hints=True
+    )
+
+
+def _render_pdf(page: Page, html_content: str) -> bytes:
+    """Render HTML to PDF bytes on a pooled page"""
+    # set_content replaces the whole document, so nothing leaks between proposals
+    # (the HTML is static and never touches cookies or storage).
+    # The proposal HTML is fully inlined (no external assets), so DOM ready is
+    # enough; networkidle would add a fixed 500ms idle window per PDF
+    page.set_content(html_content, wait_until='domcontentloaded')
+    
+    # Generate PDF with optimized pagination settings
+    return page.pdf(
+        format='A4',
+        print_background=True,
+        margin={
+            'top': '0.75in',
+            'bottom': '0.75in',
+            'left': '0.75in',
+            'right': '0.75in'
+        },
+        prefer_css_page_size=True,
+        display_header_footer=False
+    )
+
+
 class ProposalAgent:
     """AI agent that generates professional event planning proposals"""
     
@@ -51,6 +307,11 @@ class ProposalAgent:
         
         logger.info("ProposalAgent initialized with AI-powered processing")
     
+    async def warmup(self):
+        """Pre-warm the PDF renderer at app startup so the first proposal skips the browser cold start"""
+        if _uses_playwright():
+            await pdf_browser_pool.warmup()
+    
     async def generate_proposal(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate a professional proposal from raw outreach data using AI
@@ -71,7 +332,7 @@ class ProposalAgent:
             html_content = await self._generate_modern_html_proposal(structured_data)
             
             # 3. Convert to high-quality PDF
-            pdf_path = await self._convert_to_pdf(html_content, structured_data)
+            pdf_path, pdf_bytes = await self._convert_to_pdf(html_content, structured_data)
             
             # 4. Prepare response
             result = {
@@ -81,6 +342,7 @@ class ProposalAgent:
                 "event_type": structured_data["event_type"],
                 "total_investment": structured_data["total_investment"],
                 "pdf_file_path": str(pdf_path),
+                "pdf_bytes": pdf_bytes,
                 "generated_at": datetime.now().isoformat(),
                 "valid_until": (datetime.now() + timedelta(days=14)).isoformat()
             }
@@ -95,12 +357,33 @@ class ProposalAgent:
                 "message": f"Failed to generate proposal: {str(e)}"
             }
     
+    async def generate_proposals(self, raw_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate several proposals concurrently
+        
+        Args:
+            raw_data_list: Raw outreach data for each proposal
+            
+        Returns:
+            Proposal results in the same order as the input
+        """
+        logger.info("Generating proposal batch", count=len(raw_data_list))
+        limit = asyncio.BoundedSemaphore(PROPOSAL_BATCH_CONCURRENCY)
+        
+        async def generate(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with limit:
+                return await self.generate_proposal(raw_data)
+        
+        return await asyncio.gather(*(generate(raw_data) for raw_data in raw_data_list))
+    
     async def _ai_process_raw_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Use AI to intelligently process raw outreach data into structured proposal content"""
         
-        # Generate unique proposal ID
+        # Generate unique proposal ID; the random suffix keeps proposals for the
+        # same client within one second from sharing output files
         client_name = raw_data.get('client_company', 'CLIENT')
-        proposal_id = f"PROP_{client_name.upper().replace(' ', '')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        proposal_id = (f"PROP_{client_name.upper().replace(' ', '')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                       f"_{uuid.uuid4().hex[:6].upper()}")
         
         # Use Gemini AI to analyze and structure the data
         ai_analysis = await self._get_ai_analysis(raw_data)
@@ -136,6 +419,12 @@ class ProposalAgent:
     async def _get_ai_analysis(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Use Gemini AI to analyze raw outreach data and extract key insights"""
         
+        cache_key = _analysis_cache_key(raw_data)
+        cached = _ANALYSIS_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("Using cached AI analysis", client=raw_data.get("client_company"))
+            return dict(cached)
+        
         system_prompt = (
             "You are an expert event planning analyst. Analyze the provided raw outreach data "
             "and extract key event requirements and insights. Focus on understanding the client's "
@@ -178,7 +467,9 @@ class ProposalAgent:
                 system_prompt=system_prompt,
                 user_message=user_message
             )
-            return analysis
+            # Only successful analyses are cached; fallbacks should retry the AI next time
+            _ANALYSIS_CACHE[cache_key] = analysis
+            return dict(analysis)
         except Exception as e:
             logger.warning(f"AI analysis failed, using fallback: {e}")
             # Fallback to enhanced mock analysis based on input data
@@ -253,65 +544,50 @@ class ProposalAgent:
             }
         ]
         
+        # Pre-format display prices once so the template only substitutes strings
+        for package in packages:
+            package["price_fmt"] = f"{package['price']:,}"
+        
         return packages
     
     async def _generate_modern_html_proposal(self, data: Dict[str, Any]) -> str:
         """Generate modern HTML proposal using clean Apple-inspired design"""
         
-        template = Template(MODERN_PROPOSAL_TEMPLATE)
-        html_content = template.render(**data)
-        
-        return html_content
+        # Rendering is CPU-bound; run it off the event loop so concurrent
+        # proposals keep making progress on their I/O
+        documents = await asyncio.to_thread(render_proposal_targets, data, ("pdf",))
+        return documents["pdf"]
     
-    async def _convert_to_pdf(self, html_content: str, data: Dict[str, Any]) -> Path:
-        """Convert HTML to high-quality PDF using sync Playwright to avoid subprocess issues"""
-        pdf_path = self.output_dir / f"{data['proposal_id']}.pdf"
-        
-        # Run Playwright in a thread to avoid async subprocess issues
-        import asyncio
-        import threading
-        
-        def sync_pdf_generation():
-            """Generate PDF using sync Playwright"""
-            try:
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
-                    page = browser.new_page()
-                    
-                    # Set content
-                    page.set_content(html_content, wait_until='networkidle')
-                    
-                    # Generate PDF with optimized pagination settings
-                    page.pdf(
-                        path=str(pdf_path),
-                        format='A4',
-                        print_background=True,
-                        margin={
-                            'top': '0.75in',
-                            'bottom': '0.75in',
-                            'left': '0.75in',
-                            'right': '0.75in'
-                        },
-                        prefer_css_page_size=True,
-                        display_header_footer=False
-                    )
-                    
-                    browser.close()
-                    logger.info("PDF generated successfully", path=str(pdf_path))
-                    return True
-            except Exception as e:
-                logger.error("Failed to generate PDF", error=str(e))
-                return False
+    async def _convert_to_pdf(self, html_content: str, data: Dict[str, Any]) -> Tuple[Path, bytes]:
+        """
+        Convert HTML to high-quality PDF with WeasyPrint or a pooled Playwright browser
         
-        # Run in thread to avoid async context issues
-        loop = asyncio.get_event_loop()
-        success = await loop.run_in_executor(None, sync_pdf_generation)
+        Returns:
+            The saved PDF path and the PDF bytes, so callers attaching or uploading
+            the proposal do not have to read the file back
+        """
+        pdf_path = self.output_dir / f"{data['proposal_id']}.pdf"
         
-        if not success:
-            raise Exception("PDF generation failed")
+        try:
+            if _uses_playwright():
+                pdf_bytes = await pdf_browser_pool.run(_render_pdf, html_content)
+            else:
+                pdf_bytes = await asyncio.to_thread(_render_pdf_weasyprint, html_content)
+            await asyncio.to_thread(pdf_path.write_bytes, pdf_bytes)
+        except Exception as e:
+            logger.error("Failed to generate PDF", error=str(e))
+            raise Exception("PDF generation failed") from e
         
         logger.info("High-quality PDF proposal generated", file_path=str(pdf_path))
-        return pdf_path
+        return pdf_path, pdf_bytes
+
+
+def _file_size(path: str) -> int:
+    """Size of a file in bytes, or 0 when it does not exist"""
+    try:
+        return Path(path).stat().st_size
+    except FileNotFoundError:
+        return 0
 
 
 # Test function for independent testing
@@ -350,12 +626,12 @@ async def test_proposal_agent():
         print(f"Generated At: {result['generated_at']}")
         print(f"Valid Until: {result['valid_until']}")
         
-        # Check if PDF exists
-        if os.path.exists(result['pdf_file_path']):
+        # Check the PDF exists and is non-empty with a single stat
+        if _file_size(result['pdf_file_path']) > 0:
             print("✅ AI-powered PDF proposal created successfully!")
             print(f"📄 Open this file to view: {result['pdf_file_path']}")
         else:
-            print("❌ PDF file not found")
+            print("❌ PDF file not found or empty")
     else:
         print(f"❌ Error: {result['message']}")
     
@@ -2,10 +2,16 @@
 Simple Prospect Hunter Agent - Test playwright functionality through MCP server
 """
 
+import asyncio
 import json
+import logging
+import os
+import re
 import structlog
-from typing import Dict, List, Any
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain, islice
 
 from app.core.state import RainmakerState, ProspectData
 from app.mcp.playwright_scraper import simple_browser_mcp
@@ -13,12 +19,111 @@ from app.mcp.enhanced_playwright_mcp import enhanced_browser_mcp, set_workflow_i
 
 logger = structlog.get_logger(__name__)
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-@dataclass
+
+def _loads(payload):
+    """
+    Parse a JSON tool payload, with orjson when installed. orjson's decode
+    error subclasses json.JSONDecodeError, so callers catch one exception type
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+# Compiled once; _parse_contact_string runs for every raw contact string
+_EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+_PHONE_RE = re.compile(r'[\+]?[\d\s\-\(\)]{10,}')
+
+# Cheap pre-check for strings that may hold contact details
+_CONTACT_HINT_RE = re.compile(r'email|phone|@|\.com', re.IGNORECASE)
+
+# Normalized contact field -> raw keys to try, in priority order
+_FIELD_MAP = (
+    ('name', ('name', 'title', 'business_name')),
+    ('email', ('email', 'contact_email')),
+    ('phone', ('phone', 'telephone', 'contact_phone')),
+    ('linkedin', ('linkedin', 'linkedin_url')),
+    ('company', ('company', 'company_name', 'business_name', 'organization')),
+    ('location', ('location', 'address', 'city')),
+    ('website', ('website', 'url')),
+)
+
+# All hunts share the MCP server's one browser, driven from a single worker
+# thread, and the viewer's workflow id is a global; a second hunt could only
+# interleave with the first on that thread and stream under its id, so hunts
+# queue here one at a time
+HUNT_CONCURRENCY = int(os.getenv("RAINMAKER_HUNT_CONCURRENCY", "1"))
+
+# Upper bound on one AI navigation (up to 20 steps with page loads and model
+# calls); past it the navigation is stopped and the hunt fails
+HUNT_TIMEOUT_SECONDS = float(os.getenv("RAINMAKER_HUNT_TIMEOUT", "600"))
+_hunt_semaphore: Optional[asyncio.BoundedSemaphore] = None
+
+
+def _get_hunt_semaphore() -> asyncio.BoundedSemaphore:
+    """Create the hunt semaphore on first use, inside the running event loop"""
+    global _hunt_semaphore
+    if _hunt_semaphore is None:
+        _hunt_semaphore = asyncio.BoundedSemaphore(HUNT_CONCURRENCY)
+    return _hunt_semaphore
+
+
+# Planner fields that may carry the geographic focus, as a list or a single value
+_LOCATION_FIELDS = ("geographic_focus", "geographic_location_to_search", "geographic_regions")
+
+
+def _as_list(value) -> List[Any]:
+    """A planner field as a list: lists as-is, a single value wrapped, empty as []"""
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+@lru_cache(maxsize=128)
+def _build_search_goal_cached(event_types: Tuple[str, ...], location: Tuple[str, ...], industries: Tuple[str, ...],
+                              company_sizes: Tuple[str, ...], job_titles: Tuple[str, ...]) -> str:
+    """Build the AI search goal; pure over its inputs, so retries reuse the string"""
+    # Build location string from the provided location data
+    location_str = ", ".join(loc for loc in location if loc and loc != "unknown" and loc.strip())
+    
+    # Build industry/event context from the provided event types
+    event_context = " or ".join(evt for evt in event_types if evt and evt != "unknown" and evt.strip())
+    if not event_context:
+        event_context = "event"
+    
+    # Build professional context
+    professional_context = ""
+    if job_titles:
+        professional_context += f"with titles like {', '.join(job_titles)}"
+    if industries:
+        professional_context += f" in {', '.join(industries)} industries"
+    if company_sizes:
+        professional_context += f" at {', '.join(company_sizes)} companies"
+    
+    # Construct search goal - finding people/companies that NEED event planning services
+    search_goal = f"Find individuals or organizations on LinkedIn and other social media who are planning a {event_context}"
+    
+    if location_str:
+        search_goal += f" in {location_str}"
+    
+    if professional_context:
+        search_goal += f" {professional_context}"
+    
+    search_goal += ". Extract their names, contact information (email, phone, LinkedIn), company details, and any details about the upcoming event."
+    
+    return search_goal
+
+
+@dataclass(slots=True, frozen=True)
 class HuntingResults:
     """Simple results from prospect hunting test"""
     prospects_found: int
-    discovered_prospect_ids: List[int]
+    discovered_prospect_ids: Sequence[int]
     confidence_score: float
     search_summary: str
 
@@ -44,30 +149,15 @@ class ProspectHunterAgent:
                 ["events"]  # fallback
             )
             
-            # Extract geographic information from various possible fields
-            geographic_focus = state.get("geographic_focus", [])
-            geographic_location = state.get("geographic_location_to_search", [])
-            geographic_regions = state.get("geographic_regions", [])
-            
-            # Combine all location data
-            location = []
-            if isinstance(geographic_focus, list):
-                location.extend(geographic_focus)
-            elif geographic_focus:
-                location.append(geographic_focus)
-                
-            if isinstance(geographic_location, list):
-                location.extend(geographic_location)
-            elif geographic_location:
-                location.append(geographic_location)
-                
-            if isinstance(geographic_regions, list):
-                location.extend(geographic_regions)
-            elif geographic_regions:
-                location.append(geographic_regions)
-            
-            # Remove duplicates and empty values
-            location = list(set([loc for loc in location if loc and loc.strip()]))
+            # Combine location data from the various planner fields, dropping
+            # blanks and duplicates while keeping the planner's order (which
+            # also keeps the search goal cache key stable)
+            raw_locations = chain.from_iterable(
+                _as_list(state.get(field)) for field in _LOCATION_FIELDS
+            )
+            location = list(dict.fromkeys(
+                loc.strip() for loc in raw_locations if loc and loc.strip()
+            ))
             if not location:
                 location = [""]  # fallback
             
@@ -101,7 +191,7 @@ class ProspectHunterAgent:
             # Update state with results
             state["hunter_results"] = HuntingResults(
                 prospects_found=prospects_found,
-                discovered_prospect_ids=list(range(prospects_found)),  # Mock IDs for now
+                discovered_prospect_ids=range(prospects_found),  # Mock IDs for now; read-only
                 confidence_score=confidence_score,
                 search_summary=search_summary
             )
@@ -152,56 +242,44 @@ class ProspectHunterAgent:
     
     def _build_search_goal(self, event_types: List[str], location: List[str], target_profile: Dict[str, Any]) -> str:
         """Build AI search goal from campaign parameters"""
-        # Extract target details from target_profile
-        industries = target_profile.get("industries", [])
-        company_sizes = target_profile.get("company_sizes", [])
-        job_titles = target_profile.get("job_titles", [])
-        
-        # Build location string from the provided location data
-        location_str = ", ".join([loc for loc in location if loc and loc != "unknown" and loc.strip()])
-        
-        # Build industry/event context from the provided event types
-        event_context = " or ".join([evt for evt in event_types if evt and evt != "unknown" and evt.strip()])
-        if not event_context:
-            event_context = "event"
-        
-        # Build professional context
-        professional_context = ""
-        if job_titles:
-            professional_context += f"with titles like {', '.join(job_titles[:3])}"
-        if industries:
-            professional_context += f" in {', '.join(industries[:3])} industries"
-        if company_sizes:
-            professional_context += f" at {', '.join(company_sizes[:2])} companies"
-        
-        # Construct search goal - finding people/companies that NEED event planning services
-        search_goal = f"Find individuals or organizations on LinkedIn and other social media who are planning a {event_context}"
-        
-        if location_str:
-            search_goal += f" in {location_str}"
-        
-        if professional_context:
-            search_goal += f" {professional_context}"
-        
-        search_goal += ". Extract their names, contact information (email, phone, LinkedIn), company details, and any details about the upcoming event."
-        
-        return search_goal
+        # Only the leading industries/sizes/titles end up in the goal, so only
+        # those take part in the cache key
+        return _build_search_goal_cached(
+            tuple(event_types),
+            tuple(location),
+            tuple(islice(target_profile.get("industries", ()), 3)),
+            tuple(islice(target_profile.get("company_sizes", ()), 2)),
+            tuple(islice(target_profile.get("job_titles", ()), 3))
+        )
+    
+    async def _navigate(self, workflow_id: str, search_goal: str, session_id: Optional[str]):
+        """Run one navigate_and_extract call once a browser slot is free"""
+        async with _get_hunt_semaphore():
+            # Set workflow ID for screenshot tracking only once the browser is ours
+            set_workflow_id(workflow_id)
+            try:
+                return await asyncio.wait_for(
+                    enhanced_browser_mcp.call_tool('navigate_and_extract', {
+                        'url': 'https://www.linkedin.com',
+                        'extraction_goal': search_goal,
+                        'headless': False,  # Keep visible for now
+                        'session_id': session_id
+                    }),
+                    timeout=HUNT_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # The navigation is still running on the browser thread; stop
+                # it and close the browser before handing the slot on
+                await enhanced_browser_mcp.browser_manager.abort_navigation()
+                raise
     
     async def _hunt_with_ai_navigation(self, workflow_id: str, search_goal: str, session_id: str = None) -> Dict[str, Any]:
         """Use enhanced AI navigation to hunt prospects"""
         try:
             logger.info("Starting AI navigation hunt", search_goal=search_goal[:100])
             
-            # Set workflow ID for screenshot tracking
-            set_workflow_id(workflow_id)
-            
-            # Call enhanced AI navigation
-            result = await enhanced_browser_mcp.call_tool('navigate_and_extract', {
-                'url': 'https://www.linkedin.com',
-                'extraction_goal': search_goal,
-                'headless': False,  # Keep visible for now
-                'session_id': session_id
-            })
+            # Call enhanced AI navigation, waiting for a free browser slot
+            result = await self._navigate(workflow_id, search_goal, session_id)
             
             if result.isError:
                 error_text = result.content[0].text if result.content else "{}"
@@ -209,7 +287,7 @@ class ProspectHunterAgent:
                 
                 # Check if this error is actually a pause-for-login event
                 try:
-                    error_data = json.loads(error_text)
+                    error_data = _loads(error_text)
                     if error_data.get("paused_for_login"):
                         logger.info("AI navigation paused for login, propagating pause state.")
                         # Return the full data from the pause event
@@ -222,27 +300,32 @@ class ProspectHunterAgent:
                 return {"contacts": [], "summary": "Navigation failed", "success": False}
             
             # Parse AI navigation results
-            navigation_data = json.loads(result.content[0].text)
+            navigation_data = _loads(result.content[0].text)
             
             # Debug: Check for Gordon Ramsay demo mode
             if navigation_data.get("demo_mode"):
-                print(f"🎭 DEMO MODE DETECTED: Gordon Ramsay data returned")
-                print(f"    Extracted data: {navigation_data.get('extracted_data', [])}")
+                logger.debug("🎭 Demo mode detected: Gordon Ramsay data returned",
+                             extracted_data=navigation_data.get('extracted_data', []))
             
             # Extract contact information from navigation results
             contacts = self._extract_contacts_from_navigation_data(navigation_data)
             
-            # Debug: Show contact extraction results  
-            print(f"👥 EXTRACTED CONTACTS: {len(contacts)} contacts found")
-            for i, contact in enumerate(contacts):
-                print(f"    Contact {i+1}: {contact.get('name', 'Unknown')} - {contact.get('company', 'No company')}")
+            # Debug: Show contact extraction results; the per-contact summary is
+            # only built when debug logging is on
+            if logger.is_enabled_for(logging.DEBUG):
+                logger.debug("👥 Extracted contacts",
+                             count=len(contacts),
+                             contacts=[f"{contact.get('name', 'Unknown')} - {contact.get('company', 'No company')}" for contact in contacts])
+            
+            navigation_steps = navigation_data.get("navigation_steps", [])
+            sites_visited = len({step.get('url', '') for step in navigation_steps})
             
             return {
                 "contacts": contacts,
-                "navigation_summary": navigation_data.get("navigation_steps", []),
-                "sites_visited": len(set(step.get('url', '') for step in navigation_data.get('navigation_steps', []))),
+                "navigation_summary": navigation_steps,
+                "sites_visited": sites_visited,
                 "success": navigation_data.get("success", False),
-                "summary": f"Visited {len(set(step.get('url', '') for step in navigation_data.get('navigation_steps', [])))} sites, found {len(contacts)} contacts",
+                "summary": f"Visited {sites_visited} sites, found {len(contacts)} contacts",
                 # Propagate pause information from navigation results
                 "paused_for_login": navigation_data.get("paused_for_login", False),
                 "workflow_id": navigation_data.get("workflow_id"),
@@ -251,6 +334,10 @@ class ProspectHunterAgent:
                 "message": navigation_data.get("message")
             }
             
+        except asyncio.TimeoutError:
+            logger.error("AI navigation hunt timed out", timeout=HUNT_TIMEOUT_SECONDS)
+            return {"contacts": [], "summary": f"Hunt timed out after {HUNT_TIMEOUT_SECONDS:.0f}s", "success": False}
+        
         except Exception as e:
             logger.error("AI navigation hunt failed", error=str(e))
             return {"contacts": [], "summary": f"Hunt failed: {str(e)}", "success": False}
@@ -258,37 +345,51 @@ class ProspectHunterAgent:
     def _extract_contacts_from_navigation_data(self, navigation_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract structured contact information from AI navigation results"""
         contacts = []
+        seen = set()
+        
+        def add_contact(contact: Dict[str, Any]):
+            # The same person often appears under several keys or as both a
+            # dict and a raw string; keep the first occurrence
+            key = (
+                str(contact.get('email', '')).lower(),
+                str(contact.get('phone', '')).replace(' ', ''),
+                str(contact.get('linkedin', '')).lower()
+            )
+            if key not in seen:
+                seen.add(key)
+                contacts.append(contact)
         
         try:
-            extracted_data = navigation_data.get("extracted_data", [])
-            
-            for data_item in extracted_data:
-                # Handle nested extracted_data structure
-                if isinstance(data_item, dict) and 'extracted_data' in data_item:
-                    data_item = data_item['extracted_data']
+            # Walk the nested results with an explicit stack, pushing children
+            # in reverse so contacts come out in document order
+            stack = [navigation_data.get("extracted_data", [])]
+            while stack:
+                item = stack.pop()
+                item_type = type(item)
                 
-                if isinstance(data_item, dict):
+                if item_type is dict:
+                    # Handle nested extracted_data structure
+                    if 'extracted_data' in item:
+                        stack.append(item['extracted_data'])
+                        continue
+                    
                     # First try to treat the item itself as a direct contact (for Gordon Ramsay demo)
-                    if any(key in data_item for key in ['name', 'email', 'phone', 'company_name']):
-                        contact = self._normalize_contact_data(data_item)
-                        if contact:
-                            contacts.append(contact)
-                            continue
+                    contact = self._normalize_contact_data(item)
+                    if contact:
+                        add_contact(contact)
+                        continue
                     
-                    # Look for contact lists
-                    for key, value in data_item.items():
-                        if isinstance(value, list) and len(value) > 0:
-                            # Check if this looks like a contact list
-                            for item in value:
-                                if isinstance(item, dict):
-                                    contact = self._normalize_contact_data(item)
-                                    if contact:
-                                        contacts.append(contact)
-                                elif isinstance(item, str) and any(indicator in item.lower() for indicator in ['email', 'phone', '@', '.com']):
-                                    # Raw contact string
-                                    contact = self._parse_contact_string(item)
-                                    if contact:
-                                        contacts.append(contact)
+                    # Otherwise look for contact lists inside it
+                    stack.extend(value for value in reversed(item.values()) if type(value) in (dict, list))
+                
+                elif item_type is list:
+                    stack.extend(reversed(item))
+                
+                elif item_type is str and _CONTACT_HINT_RE.search(item) is not None:
+                    # Raw contact string
+                    contact = self._parse_contact_string(item)
+                    if contact:
+                        add_contact(contact)
         
         except Exception as e:
             logger.error("Failed to extract contacts", error=str(e))
@@ -299,40 +400,13 @@ class ProspectHunterAgent:
         """Normalize contact data to standard format"""
         contact = {}
         
-        # Extract name
-        name = raw_contact.get('name') or raw_contact.get('title') or raw_contact.get('business_name', '')
-        if name:
-            contact['name'] = name
-        
-        # Extract email
-        email = raw_contact.get('email') or raw_contact.get('contact_email', '')
-        if email:
-            contact['email'] = email
-        
-        # Extract phone
-        phone = raw_contact.get('phone') or raw_contact.get('telephone') or raw_contact.get('contact_phone', '')
-        if phone:
-            contact['phone'] = phone
-        
-        # Extract LinkedIn
-        linkedin = raw_contact.get('linkedin') or raw_contact.get('linkedin_url', '')
-        if linkedin:
-            contact['linkedin'] = linkedin
-        
-        # Extract company
-        company = raw_contact.get('company') or raw_contact.get('company_name') or raw_contact.get('business_name') or raw_contact.get('organization', '')
-        if company:
-            contact['company'] = company
-        
-        # Extract location
-        location = raw_contact.get('location') or raw_contact.get('address') or raw_contact.get('city', '')
-        if location:
-            contact['location'] = location
-        
-        # Extract website
-        website = raw_contact.get('website') or raw_contact.get('url', '')
-        if website:
-            contact['website'] = website
+        # First non-empty raw value wins for each field
+        for field, sources in _FIELD_MAP:
+            for source in sources:
+                value = raw_contact.get(source)
+                if value:
+                    contact[field] = value
+                    break
         
         # Only return contact if it has at least name and one contact method
         if contact.get('name') and (contact.get('email') or contact.get('phone') or contact.get('linkedin')):
@@ -342,26 +416,31 @@ class ProspectHunterAgent:
     
     def _parse_contact_string(self, contact_str: str) -> Dict[str, Any]:
         """Parse contact information from a raw string"""
-        import re
-        
         contact = {}
         
         # Extract email
-        email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', contact_str)
+        email_match = _EMAIL_RE.search(contact_str)
         if email_match:
             contact['email'] = email_match.group(0)
         
         # Extract phone (basic patterns)
-        phone_match = re.search(r'[\+]?[\d\s\-\(\)]{10,}', contact_str)
+        phone_match = _PHONE_RE.search(contact_str)
         if phone_match:
             contact['phone'] = phone_match.group(0).strip()
         
-        # Use remaining text as name (simple heuristic)
-        name = contact_str
-        if email_match:
-            name = name.replace(email_match.group(0), '')
-        if phone_match:
-            name = name.replace(phone_match.group(0), '')
+        # Use remaining text as name (simple heuristic): slice around the
+        # matched spans in one pass instead of replacing each match
+        spans = sorted(match.span() for match in (email_match, phone_match) if match)
+        parts = []
+        position = 0
+        for start, end in spans:
+            if start >= position:
+                parts.append(contact_str[position:start])
+                position = end
+            else:
+                position = max(position, end)
+        parts.append(contact_str[position:])
+        name = "".join(parts)
         
         name = name.strip(' -,')
         if name:
@@ -398,7 +477,7 @@ class ProspectHunterAgent:
                 
                 # Try to parse error details
                 try:
-                    error_data = json.loads(error_content)
+                    error_data = _loads(error_content)
                     error_type = error_data.get("error_type", "Unknown")
                     error_message = error_data.get("error", "Unknown error")
                     logger.error("Detailed error info", error_type=error_type, error_message=error_message)
@@ -409,7 +488,7 @@ class ProspectHunterAgent:
             
             # Parse the successful result
             try:
-                result_data = json.loads(result.content[0].text)
+                result_data = _loads(result.content[0].text)
                 logger.info("Parsed MCP result", success=result_data.get("success"), has_title=bool(result_data.get("page_title")))
                 
                 if result_data.get("success"):
@@ -2,10 +2,13 @@
 Dependency injection for FastAPI routes
 """
 
+import hashlib
+import threading
 from typing import Generator, Optional
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy import select
 
 from app.db.session import get_db
@@ -16,16 +19,63 @@ from app.core.security import verify_token
 # Security scheme
 security = HTTPBearer()
 
+# Authenticated users by email, so most requests skip the user lookup. The TTL
+# is short so deactivation and role changes apply within seconds; is_active is
+# still checked on every request. Sync dependencies run in FastAPI's
+# threadpool, hence the lock
+_USER_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=30)
+
+# Recently rejected tokens by hash, so replayed bad or expired tokens are
+# refused without decoding the JWT again
+_REJECTED_TOKENS: TTLCache = TTLCache(maxsize=1024, ttl=5)
+
+_CACHE_LOCK = threading.Lock()
+
+
+def _load_user_by_email(db: Session, email: str) -> Optional[User]:
+    """User for a token email, served from the short-lived cache when possible"""
+    with _CACHE_LOCK:
+        user = _USER_CACHE.get(email)
+    if user is not None:
+        return user
+    
+    # Only the columns routes read from the current user; email is unique and
+    # indexed, so this is a single index lookup
+    query = (
+        select(User)
+        .options(load_only(User.id, User.email, User.name, User.role, User.is_active))
+        .where(User.email == email)
+        .limit(1)
+    )
+    user = db.execute(query).scalar_one_or_none()
+    if user is not None:
+        # Cached instances outlive this session; routes only read their columns
+        db.expunge(user)
+        with _CACHE_LOCK:
+            _USER_CACHE[email] = user
+    return user
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """Get current authenticated user"""
-    token_data = verify_token(credentials.credentials)
+    token_key = hashlib.blake2b(credentials.credentials.encode(), digest_size=16).digest()
+    with _CACHE_LOCK:
+        rejected = _REJECTED_TOKENS.get(token_key)
+    if rejected is not None:
+        raise HTTPException(status_code=rejected.status_code, detail=rejected.detail, headers=rejected.headers)
+    
+    try:
+        token_data = verify_token(credentials.credentials)
+    except HTTPException as e:
+        with _CACHE_LOCK:
+            _REJECTED_TOKENS[token_key] = e
+        raise
     
-    # Get user from database
-    user = db.execute(select(User).where(User.email == token_data.email)).scalar_one_or_none()
+    # Get user from cache or database
+    user = _load_user_by_email(db, token_data.email)
     
     if user is None:
         raise HTTPException(
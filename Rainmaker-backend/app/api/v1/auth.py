@@ -4,7 +4,7 @@ Authentication API endpoints
 
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.db.session import get_db
@@ -16,11 +16,14 @@ from app.core.config import settings
 
 router = APIRouter()
 
+# get_db yields a sync Session, so these are plain def handlers: FastAPI runs
+# them in its threadpool instead of blocking the event loop on the queries
+
 
 @router.post("/login", response_model=Token)
-async def login(
+def login(
     login_data: LoginRequest,
-    db: AsyncSession = Depends(get_db)
+    db: Session = Depends(get_db)
 ):
     """Authenticate user and return access token"""
     # Get user from database
@@ -54,13 +57,13 @@ async def login(
 
 
 @router.post("/register", response_model=UserSchema)
-async def register(
+def register(
     user_data: UserCreate,
-    db: AsyncSession = Depends(get_db)
+    db: Session = Depends(get_db)
 ):
     """Register a new user"""
     # Check if user already exists
-    result = await db.execute(select(User).where(User.email == user_data.email))
+    result = db.execute(select(User).where(User.email == user_data.email))
     existing_user = result.scalar_one_or_none()
     
     if existing_user:
@@ -79,7 +82,7 @@ async def register(
     )
     
     db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
+    db.commit()
+    db.refresh(db_user)
     
     return db_user
\ No newline at end of file
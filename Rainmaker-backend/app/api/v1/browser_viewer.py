@@ -3,60 +3,163 @@ Browser Viewer WebSocket API for real-time browser automation viewing
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Dict, Set
+from fastapi.responses import JSONResponse, ORJSONResponse
+from typing import Any, Dict, Optional
 import json
+import logging
 import structlog
+from structlog.contextvars import bind_contextvars, unbind_contextvars
 import asyncio
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = structlog.get_logger(__name__)
 
-router = APIRouter()
+# Endpoint responses go through orjson too when it is installed
+router = APIRouter(default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse)
+
+# Active WebSocket connections organized by workflow_id, each with the queue
+# its writer task drains
+active_connections: Dict[str, Dict[WebSocket, asyncio.Queue]] = {}
+
+# Frames buffered per client; a client that falls this far behind is dropped
+CLIENT_QUEUE_SIZE = 64
+
+# Loop the viewer sockets live on, captured in setup_browser_viewer. Browser
+# callbacks arrive on the Playwright thread and are handed over to it
+_main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _dumps(data: Any) -> str:
+    """
+    Encode a WebSocket message, with orjson when installed. The viewer parses
+    frames with JSON.parse, so messages stay text frames rather than binary
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(data)
+
+
+# Greeting sent on connect; only the workflow_id varies, so the rest of the
+# object is encoded once and the id is spliced in front of it
+_CONNECTED_TAIL = _dumps({
+    "step": "Connected",
+    "details": "Browser viewer connected",
+    "status": "connected",
+    "timestamp": "now"
+})[1:]
+
+
+def _connected_message(workflow_id: str) -> str:
+    """Encoded greeting for a new viewer of a workflow"""
+    return '{"workflow_id":' + _dumps(workflow_id) + "," + _CONNECTED_TAIL
+
+# A client that cannot take a frame within this window is treated as dead
+SEND_TIMEOUT_SECONDS = 5.0
+
+
+async def _safe_send(websocket: WebSocket, message: str) -> bool:
+    """Send one frame, reporting failure instead of raising"""
+    try:
+        await asyncio.wait_for(websocket.send_text(message), timeout=SEND_TIMEOUT_SECONDS)
+        return True
+    except Exception as e:
+        logger.warning("Failed to send to websocket", error=str(e) or type(e).__name__)
+        return False
+
+
+async def _close_quietly(websocket: WebSocket, code: int, reason: str):
+    """Close a socket that may already be gone"""
+    try:
+        await websocket.close(code, reason)
+    except Exception:
+        pass
+
+
+def _evict(workflow_id: str, websocket: WebSocket, reason: str):
+    """Drop a client from its workflow and close it; its endpoint then cleans up"""
+    connections = active_connections.get(workflow_id)
+    if connections is None or connections.pop(websocket, None) is None:
+        return
+    logger.debug("Removed dead connection", workflow_id=workflow_id, reason=reason)
+    asyncio.create_task(_close_quietly(websocket, 1008, reason))
+
+
+def _enqueue(workflow_id: str, websocket: WebSocket, queue: asyncio.Queue, message: str) -> bool:
+    """Queue a frame for a client's writer, evicting the client if it has fallen behind"""
+    try:
+        queue.put_nowait(message)
+        return True
+    except asyncio.QueueFull:
+        logger.warning("Dropping slow browser viewer client", workflow_id=workflow_id)
+        _evict(workflow_id, websocket, "Client too slow")
+        return False
+
+
+async def _writer_loop(workflow_id: str, websocket: WebSocket, queue: asyncio.Queue):
+    """Send a client's queued frames in order until a send fails"""
+    while True:
+        message = await queue.get()
+        if not await _safe_send(websocket, message):
+            _evict(workflow_id, websocket, "Send failed")
+            return
 
-# Active WebSocket connections organized by workflow_id
-active_connections: Dict[str, Set[WebSocket]] = {}
 
 async def broadcast_to_workflow(workflow_id: str, data: dict):
     """Broadcast data to all connections watching a specific workflow"""
-    if workflow_id not in active_connections:
+    connections = active_connections.get(workflow_id)
+    if not connections:
         logger.debug("No connections for workflow", workflow_id=workflow_id)
         return
     
-    connections_to_remove = set()
-    message = json.dumps(data)
-    connection_count = len(active_connections[workflow_id])
-    
-    logger.debug("Broadcasting to connections", 
-                workflow_id=workflow_id, 
-                connection_count=connection_count,
-                data_type=data.get('type', 'unknown'))
+    # Encoded once however many clients are watching
+    message = _dumps(data)
+    connection_count = len(connections)
     
-    for websocket in active_connections[workflow_id].copy():
+    # Each client's writer task does the actual send, so a slow reader only
+    # backs up its own queue instead of delaying the broadcast. Nothing here
+    # awaits, so the registry is iterated in place and evictions wait until
+    # the loop is done
+    slow_clients = []
+    for websocket, queue in connections.items():
         try:
-            await websocket.send_text(message)
-            logger.debug("Successfully sent to websocket", workflow_id=workflow_id)
-        except Exception as e:
-            logger.warning("Failed to send to websocket", error=str(e))
-            connections_to_remove.add(websocket)
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            slow_clients.append(websocket)
+    
+    for websocket in slow_clients:
+        logger.warning("Dropping slow browser viewer client", workflow_id=workflow_id)
+        _evict(workflow_id, websocket, "Client too slow")
     
-    # Clean up dead connections
-    for websocket in connections_to_remove:
-        active_connections[workflow_id].discard(websocket)
-        logger.debug("Removed dead connection", workflow_id=workflow_id)
+    # One summary per broadcast rather than a line per client
+    if logger.is_enabled_for(logging.DEBUG):
+        logger.debug("Broadcast queued",
+                    workflow_id=workflow_id,
+                    data_type=data.get('type', 'unknown'),
+                    queued=connection_count - len(slow_clients),
+                    dropped=len(slow_clients))
+
+def _schedule_broadcast(workflow_id: str, viewer_data: dict):
+    """Start a broadcast task; runs on the main loop"""
+    asyncio.ensure_future(broadcast_to_workflow(workflow_id, viewer_data))
+
 
 def browser_viewer_callback(viewer_data: dict):
     """Callback function for browser updates - called from MCP server"""
     workflow_id = viewer_data.get("workflow_id")
-    if workflow_id:
+    # Fires for every browser step; skip scheduling anything nobody is watching
+    if workflow_id and active_connections.get(workflow_id):
+        loop = _main_loop
+        if loop is None or loop.is_closed():
+            logger.debug("Browser viewer loop not available, dropping update", workflow_id=workflow_id)
+            return
         try:
-            # Get the current event loop
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # Schedule broadcast in event loop
-                asyncio.create_task(broadcast_to_workflow(workflow_id, viewer_data))
-            else:
-                # If no loop is running, run it synchronously
-                asyncio.run(broadcast_to_workflow(workflow_id, viewer_data))
+            # Thread-safe hand-off from the browser thread to the main loop
+            loop.call_soon_threadsafe(_schedule_broadcast, workflow_id, viewer_data)
         except Exception as e:
             logger.warning("Failed to schedule browser update broadcast", error=str(e))
 
@@ -65,78 +168,52 @@ async def browser_viewer_websocket(websocket: WebSocket, workflow_id: str):
     """WebSocket endpoint for browser viewer updates"""
     await websocket.accept()
     
-    # Add connection to active connections
-    if workflow_id not in active_connections:
-        active_connections[workflow_id] = set()
-    active_connections[workflow_id].add(websocket)
+    # Every log line for this connection, including its writer task's, carries
+    # the workflow_id through structlog's merge_contextvars processor
+    bind_contextvars(workflow_id=workflow_id)
+    
+    # Add connection to active connections; all sends go through its queue
+    queue: asyncio.Queue = asyncio.Queue(CLIENT_QUEUE_SIZE)
+    connections = active_connections.setdefault(workflow_id, {})
+    connections[websocket] = queue
+    writer = asyncio.create_task(_writer_loop(workflow_id, websocket, queue))
     
-    logger.info("Browser viewer connected", workflow_id=workflow_id, 
-               total_connections=len(active_connections[workflow_id]))
+    logger.info("Browser viewer connected", total_connections=len(connections))
     
     try:
         # Send initial status
-        await websocket.send_text(json.dumps({
-            "workflow_id": workflow_id,
-            "step": "Connected",
-            "details": "Browser viewer connected",
-            "status": "connected",
-            "timestamp": "now"
-        }))
+        _enqueue(workflow_id, websocket, queue, _connected_message(workflow_id))
         
-        # Keep connection alive with ping/pong
+        # Keep-alive is uvicorn's protocol-level ping (ws_ping_interval); the
+        # viewer sends nothing, so just wait for it to go away
         while True:
-            try:
-                # Wait for message with timeout
-                message = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
-                logger.debug("Received websocket message", data=message[:100])
-                
-                try:
-                    parsed_message = json.loads(message)
-                    if parsed_message.get("type") == "pong":
-                        logger.debug("Received pong from client")
-                        continue
-                except json.JSONDecodeError:
-                    pass
-                
-                # Send pong response to keep connection alive
-                await websocket.send_text(json.dumps({
-                    "type": "pong",
-                    "timestamp": "now"
-                }))
-                
-            except asyncio.TimeoutError:
-                # Send ping to keep connection alive
-                try:
-                    await websocket.send_text(json.dumps({
-                        "type": "ping",
-                        "timestamp": "now"
-                    }))
-                except Exception as ping_error:
-                    logger.warning("Failed to send ping", error=str(ping_error))
-                    break
-            except WebSocketDisconnect:
-                break
-            except Exception as e:
-                logger.warning("WebSocket message handling error", error=str(e))
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                logger.info("Browser viewer disconnected")
                 break
                 
     except WebSocketDisconnect:
-        logger.info("Browser viewer disconnected", workflow_id=workflow_id)
+        logger.info("Browser viewer disconnected")
     except Exception as e:
-        logger.error("WebSocket error", error=str(e), workflow_id=workflow_id)
+        logger.error("WebSocket error", error=str(e))
     finally:
         # Clean up connection
-        if workflow_id in active_connections:
-            active_connections[workflow_id].discard(websocket)
-            if not active_connections[workflow_id]:
+        writer.cancel()
+        # Looked up again: a force cleanup may have replaced the workflow's registry
+        connections = active_connections.get(workflow_id)
+        if connections is not None:
+            connections.pop(websocket, None)
+            if not connections:
                 del active_connections[workflow_id]
         
-        logger.info("Browser viewer cleanup completed", workflow_id=workflow_id)
+        logger.info("Browser viewer cleanup completed")
+        unbind_contextvars("workflow_id")
 
 def cleanup_workflow_connections(workflow_id: str):
     """Force cleanup of all browser viewer connections for a workflow"""
-    if workflow_id in active_connections:
-        connections_to_close = list(active_connections[workflow_id])
+    connections = active_connections.pop(workflow_id, None)
+    if connections is not None:
+        connections_to_close = list(connections)
         logger.info(f"Force closing {len(connections_to_close)} browser viewer connections", 
                    workflow_id=workflow_id)
         
@@ -147,9 +224,8 @@ def cleanup_workflow_connections(workflow_id: str):
             except Exception as e:
                 logger.warning("Failed to close browser viewer connection", error=str(e))
         
-        # Clear the connection set
-        active_connections[workflow_id].clear()
-        del active_connections[workflow_id]
+        # Clear the connection registry
+        connections.clear()
         logger.info("Browser viewer connections force cleaned", workflow_id=workflow_id)
 
 @router.post("/update")
@@ -170,7 +246,10 @@ async def receive_browser_update(data: dict):
 
 # Initialize callback in MCP server
 def setup_browser_viewer():
-    """Setup browser viewer callback in MCP server"""
+    """Setup browser viewer callback in MCP server; call from the running app loop"""
+    global _main_loop
+    _main_loop = asyncio.get_running_loop()
+    
     try:
         # Setup for simple browser MCP (legacy)
         from app.mcp.playwright_scraper import set_browser_viewer_callback as set_simple_callback
@@ -208,7 +287,9 @@ async def resume_workflow_after_login(workflow_id: str):
         
         # Try to save current state (in case user just logged in)
         try:
-            state_file = browser_manager.save_browser_state(workflow_id, "linkedin")  # Assume LinkedIn for now
+            state_file = await browser_manager.run_in_browser_thread(
+                browser_manager.save_browser_state, workflow_id, "linkedin"  # Assume LinkedIn for now
+            )
             logger.info("✅ Current session state saved", state_file=state_file)
         except Exception as save_error:
             logger.warning("Failed to save current state", error=str(save_error))
@@ -253,14 +334,14 @@ async def resume_workflow_after_login(workflow_id: str):
             }
         })
         
-        return JSONResponse({
+        return {
             "success": True,
             "workflow_id": workflow_id,
             "status": "resumed",
             "message": "✅ Workflow resumed successfully. Login state has been saved for future use.",
             "saved_state": bool(browser_manager.context),
             "instruction": "You can now close the browser. The login session has been saved."
-        })
+        }
         
     except HTTPException:
         raise
@@ -285,15 +366,12 @@ async def get_workflow_browser_status(workflow_id: str):
         }
         
         if browser_manager:
-            import os
             # Check for saved state files
-            state_dir = browser_manager.state_dir
-            if os.path.exists(state_dir):
-                state_files = [f for f in os.listdir(state_dir) if workflow_id in f]
-                status["has_saved_state"] = len(state_files) > 0
-                status["state_files"] = state_files
+            state_files = browser_manager.list_state_files(workflow_id)
+            status["has_saved_state"] = len(state_files) > 0
+            status["state_files"] = state_files
         
-        return JSONResponse(status)
+        return status
         
     except Exception as e:
         logger.error("Failed to get browser status", error=str(e))
@@ -2,8 +2,11 @@
 Calendar API endpoints for meeting scheduling and Google Calendar integration
 """
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from pydantic import TypeAdapter
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 from typing import Dict, List, Any, Optional
+import asyncio
 import structlog
 from datetime import datetime
 
@@ -17,6 +20,13 @@ router = APIRouter()
 logger = structlog.get_logger(__name__)
 calendar_agent = CalendarAgent()
 
+# Built once so meeting lists are validated from the ORM rows in one call
+_meeting_list_adapter = TypeAdapter(List[MeetingResponse])
+
+# get_db yields a sync Session and the persistence manager is sync too. Handlers
+# that only touch those are plain def, so FastAPI runs them in its threadpool;
+# the two that await the calendar agent push their blocking calls to a thread
+
 @router.post("/{workflow_id}/check-meeting-response")
 async def check_meeting_response(
     workflow_id: str,
@@ -29,7 +39,7 @@ async def check_meeting_response(
     
     try:
         # Get workflow state
-        state = persistence_manager.load_state(workflow_id)
+        state = await asyncio.to_thread(persistence_manager.load_state, workflow_id)
         if not state:
             raise HTTPException(status_code=404, detail="Workflow not found")
         
@@ -47,7 +57,7 @@ async def check_meeting_response(
                 "response_analysis": response_result.get("response_analysis", ""),
                 "received_at": datetime.now().isoformat()
             }
-            persistence_manager.save_state(workflow_id, state)
+            await asyncio.to_thread(persistence_manager.save_state, workflow_id, state)
         
         logger.info("Meeting response check completed", 
                    workflow_id=workflow_id, 
@@ -63,6 +73,50 @@ async def check_meeting_response(
                     error=str(e))
         raise HTTPException(status_code=500, detail=f"Failed to check meeting response: {str(e)}")
 
+def _insert_meeting(db: Session, meeting: Meeting):
+    """Persist a new meeting and load its generated columns"""
+    db.add(meeting)
+    db.commit()
+    db.refresh(meeting)
+
+
+async def _finalize_schedule(workflow_id: str, meeting_id: int, meeting_details: Dict[str, Any], state: Dict[str, Any]):
+    """Record a scheduled meeting in the workflow state and mark its campaign completed"""
+    state["scheduled_meeting"] = {
+        "meeting_id": meeting_id,
+        "status": "scheduled",
+        "meeting_details": meeting_details,
+        "scheduled_at": datetime.now().isoformat()
+    }
+    try:
+        await asyncio.to_thread(persistence_manager.save_state, workflow_id, state)
+    except Exception as e:
+        logger.error("Failed to save workflow state after meeting schedule", error=str(e), workflow_id=workflow_id)
+    
+    # Update campaign coordinator status to completed
+    try:
+        from app.agents.campaign_coordinator import get_global_coordinator
+        coordinator = get_global_coordinator()
+
+        # Find the plan_id for this workflow
+        plan_id = coordinator.find_plan_for_workflow(workflow_id)
+        
+        if plan_id:
+            logger.info("Marking campaign as completed after meeting schedule", plan_id=plan_id)
+            execution_state = coordinator.executing_campaigns[plan_id]
+            execution_state["current_phase"] = "execution_complete"
+            execution_state["status"] = "completed"
+            execution_state["execution_completed_at"] = datetime.now()
+            execution_state["metrics"]["meetings_scheduled"] = execution_state["metrics"].get("meetings_scheduled", 0) + 1
+            coordinator.release_workflow(workflow_id)
+            coordinator._broadcast_status_update(plan_id, execution_state, force=True)
+        else:
+            logger.warning("Could not find plan_id for workflow to mark as completed", workflow_id=workflow_id)
+
+    except Exception as e:
+        logger.error("Failed to update campaign coordinator status", error=str(e), workflow_id=workflow_id)
+
+
 @router.post("/{workflow_id}/schedule-meeting")
 async def schedule_meeting(
     workflow_id: str,
@@ -78,7 +132,7 @@ async def schedule_meeting(
     
     try:
         # Get workflow state
-        state = persistence_manager.load_state(workflow_id)
+        state = await asyncio.to_thread(persistence_manager.load_state, workflow_id)
         if not state:
             raise HTTPException(status_code=404, detail="Workflow not found")
         
@@ -94,6 +148,9 @@ async def schedule_meeting(
         
         meeting_details = schedule_result["meeting_details"]
         
+        start_time = datetime.fromisoformat(meeting_details["start_time"])
+        end_time = datetime.fromisoformat(meeting_details["end_time"])
+        
         # Create meeting record in database
         meeting_data = MeetingCreate(
             workflow_id=workflow_id,
@@ -102,58 +159,24 @@ async def schedule_meeting(
             prospect_company=meeting_details.get("prospect_company", ""),
             title=meeting_details["title"],
             description=meeting_details["description"],
-            scheduled_at=datetime.fromisoformat(meeting_details["start_time"]),
-            duration_minutes=int((datetime.fromisoformat(meeting_details["end_time"]) - 
-                                datetime.fromisoformat(meeting_details["start_time"])).total_seconds() / 60),
+            scheduled_at=start_time,
+            duration_minutes=int((end_time - start_time).total_seconds() // 60),
             google_meet_link=meeting_details.get("google_meet_link"),
             calendar_event_id=meeting_details.get("calendar_event_id"),
             status="scheduled"
         )
         
-        db_meeting = Meeting(**meeting_data.dict(), user_id=current_user.id)
-        db.add(db_meeting)
-        db.commit()
-        db.refresh(db_meeting)
-        
-        # Update workflow state
-        state["scheduled_meeting"] = {
-            "meeting_id": db_meeting.id,
-            "status": "scheduled",
-            "meeting_details": meeting_details,
-            "scheduled_at": datetime.now().isoformat()
-        }
-        persistence_manager.save_state(workflow_id, state)
+        db_meeting = Meeting(**meeting_data.model_dump(), user_id=current_user.id)
+        await asyncio.to_thread(_insert_meeting, db, db_meeting)
         
         logger.info("Meeting scheduled successfully", 
                    workflow_id=workflow_id,
                    meeting_id=db_meeting.id,
                    meet_link=meeting_details.get("google_meet_link"))
-
-        # Update campaign coordinator status to completed
-        try:
-            from app.agents.campaign_coordinator import get_global_coordinator
-            coordinator = get_global_coordinator()
-
-            # Find the plan_id for this workflow
-            plan_id = None
-            for pid, execution_state in coordinator.executing_campaigns.items():
-                if execution_state.get("workflow_id") == workflow_id:
-                    plan_id = pid
-                    break
-            
-            if plan_id:
-                logger.info("Marking campaign as completed after meeting schedule", plan_id=plan_id)
-                execution_state = coordinator.executing_campaigns[plan_id]
-                execution_state["current_phase"] = "execution_complete"
-                execution_state["status"] = "completed"
-                execution_state["execution_completed_at"] = datetime.now()
-                execution_state["metrics"]["meetings_scheduled"] = execution_state["metrics"].get("meetings_scheduled", 0) + 1
-                coordinator._broadcast_status_update(plan_id, execution_state, force=True)
-            else:
-                logger.warning("Could not find plan_id for workflow to mark as completed", workflow_id=workflow_id)
-
-        except Exception as e:
-            logger.error("Failed to update campaign coordinator status", error=str(e), workflow_id=workflow_id)
+        
+        # The meeting row is committed; the workflow state and campaign status
+        # follow after the response is sent
+        background_tasks.add_task(_finalize_schedule, workflow_id, db_meeting.id, meeting_details, state)
         
         return {
             "status": "success",
@@ -172,7 +195,7 @@ async def schedule_meeting(
         raise HTTPException(status_code=500, detail=f"Failed to schedule meeting: {str(e)}")
 
 @router.get("/{workflow_id}/meetings")
-async def get_workflow_meetings(
+def get_workflow_meetings(
     workflow_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -183,12 +206,12 @@ async def get_workflow_meetings(
     logger.info("API: Getting workflow meetings", workflow_id=workflow_id, user_id=current_user.id)
     
     try:
-        meetings = db.query(Meeting).filter(
+        meetings = db.scalars(select(Meeting).where(
             Meeting.workflow_id == workflow_id,
             Meeting.user_id == current_user.id
-        ).all()
+        )).all()
         
-        return [MeetingResponse.from_orm(meeting) for meeting in meetings]
+        return _meeting_list_adapter.validate_python(meetings, from_attributes=True)
         
     except Exception as e:
         logger.error("Failed to get workflow meetings", 
@@ -197,7 +220,7 @@ async def get_workflow_meetings(
         raise HTTPException(status_code=500, detail=f"Failed to get meetings: {str(e)}")
 
 @router.get("/meetings")
-async def get_all_meetings(
+def get_all_meetings(
     limit: int = 50,
     offset: int = 0,
     status: Optional[str] = None,
@@ -210,16 +233,25 @@ async def get_all_meetings(
     logger.info("API: Getting all meetings", user_id=current_user.id, limit=limit, offset=offset)
     
     try:
-        query = db.query(Meeting).filter(Meeting.user_id == current_user.id)
+        query = select(Meeting).where(Meeting.user_id == current_user.id)
         
         if status:
-            query = query.filter(Meeting.status == status)
+            query = query.where(Meeting.status == status)
         
-        total = query.count()
-        meetings = query.offset(offset).limit(limit).all()
+        # The window function carries the full match count on every page row,
+        # so the page and the total come back in one round-trip
+        rows = db.execute(
+            query.add_columns(func.count().over().label("total")).offset(offset).limit(limit)
+        ).all()
+        meetings = [row[0] for row in rows]
+        if rows:
+            total = rows[0].total
+        else:
+            # A page past the end has no row to carry the total
+            total = db.scalar(select(func.count()).select_from(query.subquery())) if offset else 0
         
         return {
-            "meetings": [MeetingResponse.from_orm(meeting) for meeting in meetings],
+            "meetings": _meeting_list_adapter.validate_python(meetings, from_attributes=True),
             "total": total,
             "limit": limit,
             "offset": offset
@@ -232,7 +264,7 @@ async def get_all_meetings(
         raise HTTPException(status_code=500, detail=f"Failed to get meetings: {str(e)}")
 
 @router.put("/meetings/{meeting_id}")
-async def update_meeting(
+def update_meeting(
     meeting_id: int,
     meeting_update: MeetingUpdate,
     db: Session = Depends(get_db),
@@ -244,16 +276,16 @@ async def update_meeting(
     logger.info("API: Updating meeting", meeting_id=meeting_id, user_id=current_user.id)
     
     try:
-        meeting = db.query(Meeting).filter(
+        meeting = db.scalars(select(Meeting).where(
             Meeting.id == meeting_id,
             Meeting.user_id == current_user.id
-        ).first()
+        )).first()
         
         if not meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
         
         # Update meeting fields
-        for field, value in meeting_update.dict(exclude_unset=True).items():
+        for field, value in meeting_update.model_dump(exclude_unset=True).items():
             setattr(meeting, field, value)
         
         meeting.updated_at = datetime.utcnow()
@@ -261,7 +293,7 @@ async def update_meeting(
         db.refresh(meeting)
         
         logger.info("Meeting updated successfully", meeting_id=meeting_id)
-        return MeetingResponse.from_orm(meeting)
+        return MeetingResponse.model_validate(meeting)
         
     except HTTPException:
         raise
@@ -272,7 +304,7 @@ async def update_meeting(
         raise HTTPException(status_code=500, detail=f"Failed to update meeting: {str(e)}")
 
 @router.delete("/meetings/{meeting_id}")
-async def cancel_meeting(
+def cancel_meeting(
     meeting_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -283,10 +315,10 @@ async def cancel_meeting(
     logger.info("API: Cancelling meeting", meeting_id=meeting_id, user_id=current_user.id)
     
     try:
-        meeting = db.query(Meeting).filter(
+        meeting = db.scalars(select(Meeting).where(
             Meeting.id == meeting_id,
             Meeting.user_id == current_user.id
-        ).first()
+        )).first()
         
         if not meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
@@ -342,7 +374,7 @@ async def create_google_meet_event(
         raise HTTPException(status_code=500, detail=f"Failed to create Google Meet event: {str(e)}")
 
 @router.get("/{workflow_id}/status")
-async def get_calendar_status(
+def get_calendar_status(
     workflow_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -362,19 +394,25 @@ async def get_calendar_status(
         meeting_response = state.get("meeting_response", {})
         scheduled_meeting = state.get("scheduled_meeting", {})
         
-        # Get meeting records from database
-        meetings = db.query(Meeting).filter(
+        # Count the workflow's meetings and fetch only the latest one
+        workflow_meetings = (
             Meeting.workflow_id == workflow_id,
             Meeting.user_id == current_user.id
-        ).all()
+        )
+        meeting_count = db.scalar(select(func.count(Meeting.id)).where(*workflow_meetings))
+        latest_meeting = db.scalars(
+            select(Meeting).where(*workflow_meetings)
+            .order_by(Meeting.created_at.desc(), Meeting.id.desc())
+            .limit(1)
+        ).first() if meeting_count else None
         
         return {
             "workflow_id": workflow_id,
             "has_meeting_response": bool(meeting_response),
             "meeting_response_status": meeting_response.get("status", "pending"),
             "has_scheduled_meeting": bool(scheduled_meeting),
-            "scheduled_meeting_count": len(meetings),
-            "latest_meeting": MeetingResponse.from_orm(meetings[-1]) if meetings else None,
+            "scheduled_meeting_count": meeting_count,
+            "latest_meeting": MeetingResponse.model_validate(latest_meeting) if latest_meeting else None,
             "can_check_response": True,  # Always allow checking for responses
             "can_schedule_meeting": meeting_response.get("status") == "accepted"
         }
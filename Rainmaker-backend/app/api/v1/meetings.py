@@ -87,7 +87,7 @@ async def create_meeting(
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new meeting"""
-    db_meeting = Meeting(**meeting_data.dict())
+    db_meeting = Meeting(**meeting_data.model_dump())
     db.add(db_meeting)
     await db.commit()
     await db.refresh(db_meeting)
@@ -160,11 +160,7 @@ async def proceed_to_proposal(
             coordinator = get_global_coordinator()
             
             # Find the plan_id for this workflow
-            plan_id = None
-            for pid, execution_state in coordinator.executing_campaigns.items():
-                if execution_state.get("workflow_id") == workflow_id:
-                    plan_id = pid
-                    break
+            plan_id = coordinator.find_plan_for_workflow(workflow_id)
             
             if plan_id:
                 logger.info("🔄 Triggering force sync for campaign coordinator", 
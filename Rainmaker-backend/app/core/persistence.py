@@ -7,11 +7,14 @@ recovery and audit purposes.
 
 import json
 import asyncio
+import threading
+from concurrent.futures import Future
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import uuid
 
 import structlog
+from cachetools import TTLCache
 from sqlalchemy import text, select, insert, update, delete
 from sqlalchemy.orm import Session
 
@@ -21,6 +24,31 @@ from app.mcp.database import database_mcp
 
 logger = structlog.get_logger(__name__)
 
+# Serialized state of recently loaded workflows, so status polls skip the
+# database. Each load still deserializes its own copy, so callers may mutate
+# what they get back. Module level because several StatePersistence instances
+# exist; saves and archives invalidate. Loads run in threadpools, hence the lock
+_STATE_DATA_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_STATE_CACHE_LOCK = threading.Lock()
+
+# Bumped on every invalidation; a load only caches what it read if no save
+# landed while it was querying, so a stale row is never cached after a save
+_state_generation = 0
+
+# Database reads in progress per workflow. Parallel polls of the same workflow
+# wait on the first caller's read instead of each querying; an invalidation
+# detaches the read so callers after a save start a fresh one
+_INFLIGHT_LOADS: Dict[str, Future] = {}
+
+
+def _invalidate_cached_state(workflow_id: str):
+    """Drop a workflow's cached state after it changes"""
+    global _state_generation
+    with _STATE_CACHE_LOCK:
+        _STATE_DATA_CACHE.pop(workflow_id, None)
+        _INFLIGHT_LOADS.pop(workflow_id, None)
+        _state_generation += 1
+
 
 class StatePersistence:
     """
@@ -166,6 +194,7 @@ class StatePersistence:
                 
                 db.commit()
             
+            _invalidate_cached_state(workflow_id)
             logger.debug("State saved", workflow_id=workflow_id, stage=current_stage)
             return True
             
@@ -173,6 +202,54 @@ class StatePersistence:
             logger.error("Failed to save state", workflow_id=workflow_id, error=str(e))
             return False
     
+    def _query_state_data(self, workflow_id: str) -> Optional[str]:
+        """Serialized state of an unarchived workflow straight from the database"""
+        self._ensure_table_ready()
+        
+        # Use direct database session
+        with SessionLocal() as db:
+            query = f"""
+            SELECT state_data FROM {self.table_name} 
+            WHERE workflow_id = :workflow_id AND is_archived = FALSE
+            """
+            
+            result = db.execute(text(query), {"workflow_id": workflow_id})
+            row = result.fetchone()
+        
+        return row[0] if row else None
+    
+    def _load_state_data(self, workflow_id: str) -> Optional[str]:
+        """Serialized state from the cache, an in-flight read, or a new query"""
+        with _STATE_CACHE_LOCK:
+            state_data = _STATE_DATA_CACHE.get(workflow_id)
+            if state_data is not None:
+                return state_data
+            generation = _state_generation
+            inflight = _INFLIGHT_LOADS.get(workflow_id)
+            if inflight is None:
+                owned = _INFLIGHT_LOADS[workflow_id] = Future()
+        
+        if inflight is not None:
+            return inflight.result()
+        
+        try:
+            state_data = self._query_state_data(workflow_id)
+        except BaseException as e:
+            with _STATE_CACHE_LOCK:
+                if _INFLIGHT_LOADS.get(workflow_id) is owned:
+                    del _INFLIGHT_LOADS[workflow_id]
+            owned.set_exception(e)
+            raise
+        
+        # Cache before detaching so no caller slips in between and queries again
+        with _STATE_CACHE_LOCK:
+            if state_data is not None and generation == _state_generation:
+                _STATE_DATA_CACHE[workflow_id] = state_data
+            if _INFLIGHT_LOADS.get(workflow_id) is owned:
+                del _INFLIGHT_LOADS[workflow_id]
+        owned.set_result(state_data)
+        return state_data
+    
     def load_state(self, workflow_id: str) -> Optional[RainmakerState]:
         """
         Load workflow state from persistence layer.
@@ -184,35 +261,22 @@ class StatePersistence:
             Workflow state or None if not found
         """
         try:
-            self._ensure_table_ready()
+            state_data = self._load_state_data(workflow_id)
+            if state_data is None:
+                return None
             
-            # Use direct database session
-            with SessionLocal() as db:
-                query = f"""
-                SELECT state_data FROM {self.table_name} 
-                WHERE workflow_id = :workflow_id AND is_archived = FALSE
-                """
-                
-                result = db.execute(text(query), {"workflow_id": workflow_id})
-                row = result.fetchone()
-                
-                if not row:
-                    return None
-                
-                state_data = row[0]
-                
-                # Deserialize state with error handling
-                try:
-                    state = StateManager.deserialize_state(state_data)
-                except Exception as deserialize_error:
-                    logger.error("Failed to deserialize state", 
-                               workflow_id=workflow_id, 
-                               error=str(deserialize_error),
-                               state_data_preview=state_data[:200] if isinstance(state_data, str) else "not_string")
-                    return None
-                
-                logger.debug("State loaded", workflow_id=workflow_id)
-                return state
+            # Deserialize state with error handling
+            try:
+                state = StateManager.deserialize_state(state_data)
+            except Exception as deserialize_error:
+                logger.error("Failed to deserialize state", 
+                           workflow_id=workflow_id, 
+                           error=str(deserialize_error),
+                           state_data_preview=state_data[:200] if isinstance(state_data, str) else "not_string")
+                return None
+            
+            logger.debug("State loaded", workflow_id=workflow_id)
+            return state
             
         except Exception as e:
             logger.error("Failed to load state", workflow_id=workflow_id, error=str(e))
@@ -245,6 +309,7 @@ class StatePersistence:
             if result.isError:
                 raise Exception(f"Archive operation failed: {result.content[0].text}")
             
+            _invalidate_cached_state(workflow_id)
             logger.info("State archived", workflow_id=workflow_id)
             return True
             
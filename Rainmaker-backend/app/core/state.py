@@ -6,6 +6,7 @@ state validation, serialization, and persistence for workflow recovery.
 """
 
 from typing import TypedDict, List, Optional, Dict, Any, Union
+from dataclasses import asdict, is_dataclass
 from datetime import datetime
 from enum import Enum
 import json
@@ -367,6 +368,11 @@ class StateManager:
                 return obj.dict()
             elif isinstance(obj, Enum):
                 return obj.value
+            elif isinstance(obj, range):
+                return list(obj)
+            elif is_dataclass(obj) and not isinstance(obj, type):
+                # Slotted dataclasses have no __dict__
+                return asdict(obj)
             elif hasattr(obj, '__dict__'):
                 return obj.__dict__
             return str(obj)
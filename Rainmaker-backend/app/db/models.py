@@ -2,7 +2,7 @@
 SQLAlchemy database models
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Boolean, JSON, Index
 from sqlalchemy.sql.sqltypes import Numeric
 from sqlalchemy.dialects.mysql import TEXT, LONGTEXT
 from sqlalchemy.orm import relationship
@@ -188,6 +188,12 @@ class Proposal(Base):
 
 class Meeting(Base):
     __tablename__ = "meetings"
+    __table_args__ = (
+        # Calendar endpoints always filter by user, then by workflow (newest
+        # first for the status check) or by status
+        Index("ix_meetings_user_workflow_created", "user_id", "workflow_id", "created_at"),
+        Index("ix_meetings_user_status", "user_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     workflow_id = Column(String(255), index=True)  # Added for workflow tracking
@@ -3,9 +3,11 @@ Browser Manager for Playwright MCP
 Handles browser lifecycle and basic operations
 """
 
+import asyncio
 import base64
 import os
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import structlog
 from playwright.sync_api import sync_playwright, Browser, Page, BrowserContext
@@ -20,6 +22,9 @@ except ImportError:
     STEALTH_AVAILABLE = False
     logger.warning("playwright_stealth not available")
 
+# Quality of the viewer screenshots; text stays legible well below 100
+SCREENSHOT_JPEG_QUALITY = 70
+
 
 class BrowserManager:
     """
@@ -31,10 +36,38 @@ class BrowserManager:
         self.context: Optional[BrowserContext] = None
         self.playwright = None
         self._executor = ThreadPoolExecutor(max_workers=1)
+        # Set by abort_navigation; the navigation loop checks it between steps
+        self.cancel_requested = threading.Event()
         self.workflow_id: Optional[str] = None
         self.browser_viewer_callback = browser_viewer_callback
         self.state_dir = os.path.join(os.getcwd(), "browser_states")
         os.makedirs(self.state_dir, exist_ok=True)
+        # (directory mtime, file names) from the last listing of state_dir
+        self._state_listing: Tuple[Optional[int], Tuple[str, ...]] = (None, ())
+    
+    async def run_in_browser_thread(self, func, *args):
+        """
+        Run a sync browser call from async code. Sync Playwright objects belong
+        to the thread that created them, so calls go through the manager's
+        executor rather than a generic thread pool or the event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    async def abort_navigation(self):
+        """
+        Stop the navigation running on the browser thread and close the browser.
+        Cancelling the awaiting coroutine leaves the sync job running, so this
+        asks the step loop to stop and returns only once the thread is free;
+        the next page gets a freshly launched browser
+        """
+        self.cancel_requested.set()
+        
+        def reset():
+            self.cancel_requested.clear()
+            self.close()
+        
+        await self.run_in_browser_thread(reset)
     
     def _capture_browser_step(self, page: Page, step_name: str, details: str = ""):
         """Capture browser state and send to frontend via callback"""
@@ -49,7 +82,11 @@ class BrowserManager:
                 except:
                     pass
                 
-                screenshot_bytes = page.screenshot(full_page=False, timeout=10000)  # Increased from 3000ms to 10000ms
+                # JPEG is a fraction of the PNG size and is only ever shown in the
+                # viewer, so every subscriber gets the smaller frame
+                screenshot_bytes = page.screenshot(
+                    full_page=False, type="jpeg", quality=SCREENSHOT_JPEG_QUALITY, timeout=10000  # Increased from 3000ms to 10000ms
+                )
                 screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
                 logger.debug("Screenshot captured successfully", step=step_name)
             except Exception as screenshot_error:
@@ -115,12 +152,29 @@ class BrowserManager:
         try:
             state_file = self.get_state_file_path(workflow_id, site_name)
             state = self.context.storage_state(path=state_file)
+            self._state_listing = (None, ())
             logger.info("Browser state saved", state_file=state_file, cookies_count=len(state.get("cookies", [])))
             return state_file
         except Exception as e:
             logger.error("Failed to save browser state", error=str(e))
             return None
     
+    def list_state_files(self, workflow_id: str) -> List[str]:
+        """
+        Saved state files for a workflow. The viewer polls this, so the
+        directory is only re-read after its mtime changes or a save
+        """
+        try:
+            mtime = os.stat(self.state_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        
+        listed_mtime, names = self._state_listing
+        if mtime != listed_mtime:
+            names = tuple(os.listdir(self.state_dir))
+            self._state_listing = (mtime, names)
+        return [name for name in names if workflow_id in name]
+    
     def load_browser_state(self, workflow_id: str, site_name: str = "default") -> bool:
         """Load browser context state if it exists"""
         state_file = self.get_state_file_path(workflow_id, site_name)
@@ -271,13 +325,20 @@ class BrowserManager:
     
     def close(self):
         """Close browser and cleanup"""
-        if self.context:
+        # Check what is actually open instead of letting calls on dead handles
+        # raise; one failing step must not stop the rest of the teardown
+        context, self.context = self.context, None
+        browser, self.browser = self.browser, None
+        playwright, self.playwright = self.playwright, None
+        
+        for name, close in (
+            ("context", context.close if context is not None else None),
+            ("browser", browser.close if browser is not None and browser.is_connected() else None),
+            ("playwright", playwright.stop if playwright is not None else None),
+        ):
+            if close is None:
+                continue
             try:
-                self.context.close()
-                self.context = None
+                close()
             except Exception as e:
-                logger.warning("Failed to close context", error=str(e))
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
\ No newline at end of file
+                logger.warning(f"Failed to close {name}", error=str(e))
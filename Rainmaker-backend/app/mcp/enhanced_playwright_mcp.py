@@ -305,6 +305,20 @@ class EnhancedPlaywrightMCP:
     def close(self):
         """Close browser and cleanup"""
         self.browser_manager.close()
+    
+    async def warmup(self, headless: bool = False):
+        """Launch the shared browser ahead of the first hunt so it skips the cold start"""
+        await self.browser_manager.run_in_browser_thread(self.browser_manager._ensure_browser_sync, headless)
+    
+    async def aclose(self):
+        """Close browser and cleanup on the browser thread, off the event loop"""
+        await self.browser_manager.run_in_browser_thread(self.browser_manager.close)
+    
+    async def __aenter__(self) -> "EnhancedPlaywrightMCP":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
 
 
 # Create global enhanced MCP server instance
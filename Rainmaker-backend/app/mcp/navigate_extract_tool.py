@@ -84,8 +84,10 @@ class NavigateExtractTool:
         
         try:
             result = await asyncio.get_event_loop().run_in_executor(self.browser_manager._executor, sync_navigate_extract)
+            # Compact separators: the payload is parsed straight back by the agent,
+            # and indentation inflates large extraction results considerably
             return CallToolResult(
-                content=[TextContent(type="text", text=json.dumps(result, indent=2))],
+                content=[TextContent(type="text", text=json.dumps(result, separators=(",", ":")))],
                 isError=not result.get("success", False)
             )
         except Exception as e:
@@ -110,6 +112,10 @@ class NavigateExtractTool:
         }
         
         for step in range(self.max_steps):
+            if self.browser_manager.cancel_requested.is_set():
+                logger.warning("Navigation cancelled, stopping", step=step + 1)
+                break
+            
             try:
                 logger.info("AI step", step=step + 1, url=page.url)
                 
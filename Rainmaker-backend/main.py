@@ -3,6 +3,7 @@ Rainmaker FastAPI Application Entry Point
 """
 
 import asyncio
+import logging
 import sys
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -16,8 +17,20 @@ if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 from app.core.config import settings
+
+import structlog
+
+# structlog is otherwise unconfigured, so every debug call runs the processor
+# chain and prints. A filtering bound logger turns calls below LOG_LEVEL into
+# no-ops before any event dict is processed. An unknown LOG_LEVEL falls back to INFO
+log_level = logging.getLevelNamesMapping().get(settings.LOG_LEVEL.upper(), logging.INFO)
+structlog.configure(
+    wrapper_class=structlog.make_filtering_bound_logger(log_level),
+    cache_logger_on_first_use=True
+)
+
 from app.api.v1 import prospects, campaigns, conversations, proposals, meetings, auth, campaign_planning, browser_viewer, enrichment_viewer, outreach, workflow_proposals, calendar, meeting_workflow
-from app.db.session import engine
+from app.db.session import engine, warm_pool
 from app.db import models
 
 
@@ -30,6 +43,13 @@ async def lifespan(app: FastAPI):
     # Create database tables
     models.Base.metadata.create_all(bind=engine)
     
+    # Fill the connection pool before the first requests need it
+    try:
+        opened = await asyncio.to_thread(warm_pool)
+        print(f"✅ Database pool warmed up ({opened} connections)")
+    except Exception as e:
+        print(f"❌ Failed to warm up database pool: {str(e)}")
+    
     # Setup browser viewer
     try:
         from app.api.v1.browser_viewer import setup_browser_viewer
@@ -54,6 +74,23 @@ async def lifespan(app: FastAPI):
         import traceback
         traceback.print_exc()
     
+    # Pre-warm the proposal PDF renderer
+    try:
+        from app.agents.proposal import ProposalAgent
+        await ProposalAgent().warmup()
+        print("✅ Proposal PDF renderer warmed up")
+    except Exception as e:
+        print(f"❌ Failed to warm up proposal PDF renderer: {str(e)}")
+    
+    # Launch the shared hunting browser before the first campaign needs it
+    if os.getenv("HUNT_BROWSER_WARMUP", "true").lower() in ("1", "true", "yes"):
+        try:
+            from app.mcp.enhanced_playwright_mcp import enhanced_browser_mcp
+            await enhanced_browser_mcp.warmup()
+            print("✅ Hunting browser warmed up")
+        except Exception as e:
+            print(f"❌ Failed to warm up hunting browser: {str(e)}")
+    
     print("✅ Database tables created")
     print("✅ Browser viewer initialized")
     print("✅ Enrichment viewer initialized")
@@ -64,6 +101,20 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down Rainmaker API...")
+    
+    # Release pooled proposal PDF browsers
+    try:
+        from app.agents.proposal import pdf_browser_pool
+        await pdf_browser_pool.close()
+    except Exception as e:
+        print(f"❌ Failed to close PDF browser pool: {str(e)}")
+    
+    # Release the hunting browser off the event loop
+    try:
+        from app.mcp.enhanced_playwright_mcp import enhanced_browser_mcp
+        await enhanced_browser_mcp.aclose()
+    except Exception as e:
+        print(f"❌ Failed to close hunting browser: {str(e)}")
 
 
 # Create FastAPI application
@@ -154,5 +205,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # Protocol-level keep-alive for the viewer WebSockets (uvicorn's defaults)
+        ws_ping_interval=20.0,
+        ws_ping_timeout=20.0
     )
\ No newline at end of file
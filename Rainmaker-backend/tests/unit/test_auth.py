@@ -0,0 +1,56 @@
+"""
+Unit tests for the authentication endpoints
+"""
+
+import inspect
+
+import pytest
+from fastapi import HTTPException
+from unittest.mock import MagicMock
+
+from app.api.v1 import auth
+from app.db.schemas import LoginRequest, UserCreate
+
+
+def _db_returning(user):
+    """Session mock whose user lookup returns the given user"""
+    db = MagicMock()
+    db.execute.return_value.scalar_one_or_none.return_value = user
+    return db
+
+
+class TestAuthEndpoints:
+    """Test cases for login and registration on the sync session"""
+
+    def test_handlers_run_in_threadpool(self):
+        """Test that the handlers are sync so queries never block the event loop"""
+        assert not inspect.iscoroutinefunction(auth.login)
+        assert not inspect.iscoroutinefunction(auth.register)
+
+    def test_register_creates_user(self):
+        """Test that a new email is registered with a hashed password"""
+        db = _db_returning(None)
+
+        user = auth.register(UserCreate(email="jane@acme.com", name="Jane", password="secret"), db)
+
+        db.add.assert_called_once_with(user)
+        db.commit.assert_called_once()
+        db.refresh.assert_called_once_with(user)
+        assert user.hashed_password != "secret"
+
+    def test_register_rejects_existing_email(self):
+        """Test that an already registered email is refused"""
+        db = _db_returning(MagicMock())
+
+        with pytest.raises(HTTPException) as exc_info:
+            auth.register(UserCreate(email="jane@acme.com", name="Jane", password="secret"), db)
+
+        assert exc_info.value.status_code == 400
+        db.add.assert_not_called()
+
+    def test_login_rejects_unknown_user(self):
+        """Test that an unknown email cannot log in"""
+        with pytest.raises(HTTPException) as exc_info:
+            auth.login(LoginRequest(email="jane@acme.com", password="secret"), _db_returning(None))
+
+        assert exc_info.value.status_code == 401
@@ -0,0 +1,259 @@
+"""
+Unit tests for the browser viewer WebSocket broadcasts
+"""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.api.v1 import browser_viewer
+from app.api.v1.browser_viewer import broadcast_to_workflow, _dumps, _writer_loop
+
+
+def _mock_websocket():
+    websocket = MagicMock()
+    websocket.send_text = AsyncMock()
+    return websocket
+
+
+class TestBroadcastSerialization:
+    """Test cases for encoding broadcast messages"""
+
+    def test_dumps_matches_stdlib_json(self):
+        """Test that encoded messages decode to the original data"""
+        data = {"type": "browser_update", "data": {"step": "Navigating", "progress": 0.5, "urls": ["a", "b"]}}
+
+        assert json.loads(_dumps(data)) == data
+
+    def test_dumps_stdlib_fallback(self):
+        """Test that messages are still encoded without orjson"""
+        with patch.object(browser_viewer, "ORJSON_AVAILABLE", False):
+            assert json.loads(_dumps({"type": "ping"})) == {"type": "ping"}
+
+    @pytest.mark.parametrize("orjson_available", [True, False])
+    def test_connected_message_is_valid_json(self, orjson_available):
+        """Test that the spliced greeting decodes to the full status object"""
+        with patch.object(browser_viewer, "ORJSON_AVAILABLE", orjson_available):
+            tail = browser_viewer._dumps({"step": "Connected", "details": "Browser viewer connected",
+                                          "status": "connected", "timestamp": "now"})[1:]
+            with patch.object(browser_viewer, "_CONNECTED_TAIL", tail):
+                message = browser_viewer._connected_message('wf-"1"')
+
+        assert json.loads(message) == {
+            "workflow_id": 'wf-"1"',
+            "step": "Connected",
+            "details": "Browser viewer connected",
+            "status": "connected",
+            "timestamp": "now"
+        }
+
+    @pytest.mark.asyncio
+    async def test_broadcast_queues_text_frames(self):
+        """Test that every subscriber's queue receives the same encoded text frame"""
+        first, second = asyncio.Queue(), asyncio.Queue()
+        data = {"type": "browser_update", "data": {"workflow_id": "wf-1"}}
+
+        with patch.dict(browser_viewer.active_connections, {"wf-1": {_mock_websocket(): first, _mock_websocket(): second}}, clear=True):
+            await broadcast_to_workflow("wf-1", data)
+
+        for queue in (first, second):
+            sent = queue.get_nowait()
+            assert isinstance(sent, str)
+            assert json.loads(sent) == data
+
+
+class TestClientQueues:
+    """Test cases for the per-client outbound queues"""
+
+    @pytest.mark.asyncio
+    async def test_full_queue_evicts_only_slow_client(self):
+        """Test that a client whose queue is full is dropped and the others still get the frame"""
+        fast, slow = _mock_websocket(), _mock_websocket()
+        slow.close = AsyncMock()
+        fast_queue, slow_queue = asyncio.Queue(1), asyncio.Queue(1)
+        slow_queue.put_nowait("backlog")
+        connections = {fast: fast_queue, slow: slow_queue}
+
+        with patch.dict(browser_viewer.active_connections, {"wf-1": connections}, clear=True):
+            await broadcast_to_workflow("wf-1", {"type": "browser_update"})
+            await asyncio.sleep(0)
+
+        assert fast_queue.qsize() == 1
+        assert connections == {fast: fast_queue}
+        slow.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_several_slow_clients_evicted_in_one_broadcast(self):
+        """Test that evicting several clients does not disturb iterating the registry"""
+        connections = {}
+        for _ in range(3):
+            queue = asyncio.Queue(1)
+            queue.put_nowait("backlog")
+            connections[_mock_websocket()] = queue
+
+        with patch.dict(browser_viewer.active_connections, {"wf-1": connections}, clear=True):
+            await broadcast_to_workflow("wf-1", {"type": "browser_update"})
+
+        assert connections == {}
+
+    @pytest.mark.asyncio
+    async def test_writer_sends_in_order(self):
+        """Test that the writer task drains the queue onto the socket in order"""
+        websocket = _mock_websocket()
+        queue = asyncio.Queue()
+        for frame in ("one", "two", "three"):
+            queue.put_nowait(frame)
+
+        with patch.dict(browser_viewer.active_connections, {"wf-1": {websocket: queue}}, clear=True):
+            writer = asyncio.create_task(_writer_loop("wf-1", websocket, queue))
+            while not queue.empty():
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            writer.cancel()
+
+        assert [call.args[0] for call in websocket.send_text.await_args_list] == ["one", "two", "three"]
+
+    @pytest.mark.asyncio
+    async def test_writer_evicts_on_failed_send(self):
+        """Test that a stalled send ends the writer and drops the client"""
+        websocket = MagicMock()
+        websocket.close = AsyncMock()
+
+        async def stall(message):
+            await asyncio.sleep(10)
+
+        websocket.send_text = stall
+        queue = asyncio.Queue()
+        queue.put_nowait("frame")
+        connections = {websocket: queue}
+
+        with patch.dict(browser_viewer.active_connections, {"wf-1": connections}, clear=True), \
+                patch.object(browser_viewer, "SEND_TIMEOUT_SECONDS", 0.05):
+            await asyncio.wait_for(_writer_loop("wf-1", websocket, queue), timeout=1)
+            await asyncio.sleep(0)
+
+        assert connections == {}
+        websocket.close.assert_awaited_once()
+
+
+class TestViewerEndpoint:
+    """Test cases for the browser viewer WebSocket endpoint"""
+
+    def test_connect_receives_status(self):
+        """Test that frames sent through the client's queue reach the socket"""
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        app = FastAPI()
+        app.include_router(browser_viewer.router)
+
+        with TestClient(app).websocket_connect("/ws/wf-1") as websocket:
+            assert websocket.receive_json()["status"] == "connected"
+            websocket.send_text('{"type": "pong"}')
+
+        assert "wf-1" not in browser_viewer.active_connections
+
+    def test_connection_logs_carry_workflow_id(self):
+        """Test that the workflow_id is bound for the connection and released afterwards"""
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from structlog.contextvars import get_contextvars
+
+        app = FastAPI()
+        app.include_router(browser_viewer.router)
+        bound = []
+
+        with patch.object(browser_viewer, "logger") as logger:
+            logger.info.side_effect = lambda *args, **kwargs: bound.append(get_contextvars().get("workflow_id"))
+            with TestClient(app).websocket_connect("/ws/wf-1") as websocket:
+                websocket.receive_json()
+
+        assert bound and set(bound) == {"wf-1"}
+        assert "workflow_id" not in logger.info.call_args.kwargs
+
+    def test_status_uses_orjson_response(self, tmp_path):
+        """Test that HTTP endpoints return through the router's orjson response class"""
+        from fastapi import FastAPI
+        from fastapi.responses import ORJSONResponse
+        from fastapi.testclient import TestClient
+        from app.mcp.enhanced_playwright_mcp import enhanced_browser_mcp
+
+        app = FastAPI()
+        app.include_router(browser_viewer.router)
+
+        with patch.object(enhanced_browser_mcp.browser_manager, "state_dir", str(tmp_path)):
+            response = TestClient(app).get("/status/wf-1")
+
+        assert browser_viewer.router.default_response_class is ORJSONResponse
+        assert response.status_code == 200
+        assert response.json()["state_files"] == []
+
+
+class TestNoSubscribers:
+    """Test cases for broadcasts nobody is watching"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_skips_encoding(self):
+        """Test that nothing is encoded when a workflow has no clients"""
+        with patch.dict(browser_viewer.active_connections, {"wf-1": {}}, clear=True), \
+                patch.object(browser_viewer, "_dumps") as dumps:
+            await broadcast_to_workflow("wf-1", {"type": "browser_update"})
+
+        dumps.assert_not_called()
+
+    def test_callback_schedules_nothing(self):
+        """Test that the MCP callback returns before touching the event loop"""
+        loop = MagicMock()
+        with patch.dict(browser_viewer.active_connections, {}, clear=True), \
+                patch.object(browser_viewer, "_main_loop", loop):
+            browser_viewer.browser_viewer_callback({"workflow_id": "wf-1", "step": "Navigating"})
+
+        loop.call_soon_threadsafe.assert_not_called()
+
+
+class TestCallbackThreadHandOff:
+    """Test cases for browser callbacks arriving from the Playwright thread"""
+
+    @pytest.mark.asyncio
+    async def test_callback_from_browser_thread_reaches_main_loop(self):
+        """Test that a callback on another thread queues the frame on the main loop"""
+        queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        with patch.dict(browser_viewer.active_connections, {"wf-1": {_mock_websocket(): queue}}, clear=True), \
+                patch.object(browser_viewer, "_main_loop", loop):
+            await asyncio.to_thread(browser_viewer.browser_viewer_callback, {"workflow_id": "wf-1", "step": "Navigating"})
+            frame = await asyncio.wait_for(queue.get(), timeout=1)
+
+        assert json.loads(frame)["step"] == "Navigating"
+
+    def test_callback_without_loop_is_dropped(self):
+        """Test that updates before setup are dropped instead of running a new loop"""
+        with patch.dict(browser_viewer.active_connections, {"wf-1": {_mock_websocket(): asyncio.Queue()}}, clear=True), \
+                patch.object(browser_viewer, "_main_loop", None), \
+                patch.object(browser_viewer.asyncio, "run") as run:
+            browser_viewer.browser_viewer_callback({"workflow_id": "wf-1"})
+
+        run.assert_not_called()
+
+
+class TestForceCleanup:
+    """Test cases for closing every viewer of a workflow"""
+
+    @pytest.mark.asyncio
+    async def test_cleanup_closes_and_unregisters(self):
+        """Test that all viewers are closed and the workflow is removed from the registry"""
+        first, second = _mock_websocket(), _mock_websocket()
+        first.close = AsyncMock()
+        second.close = AsyncMock()
+
+        with patch.dict(browser_viewer.active_connections, {"wf-1": {first: asyncio.Queue(), second: asyncio.Queue()}}, clear=True):
+            browser_viewer.cleanup_workflow_connections("wf-1")
+            await asyncio.sleep(0)
+
+            assert "wf-1" not in browser_viewer.active_connections
+
+        first.close.assert_awaited_once_with(1000, "Phase transition")
+        second.close.assert_awaited_once_with(1000, "Phase transition")
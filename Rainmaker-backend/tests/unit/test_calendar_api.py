@@ -0,0 +1,216 @@
+"""
+Unit tests for the calendar API endpoints
+"""
+
+import sys
+from datetime import datetime, timedelta
+from types import ModuleType, SimpleNamespace
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import BackgroundTasks
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Meeting, User
+from app.db.session import Base
+
+# app.agents.calendar builds its Gemini and Google clients at import time; the
+# endpoints only need an object to call, so only that module is stubbed while
+# the router imports (everything else it pulls in stays loaded as usual)
+_calendar_agent_module = ModuleType("app.agents.calendar")
+_calendar_agent_module.CalendarAgent = MagicMock
+_real_calendar_agent_module = sys.modules.get("app.agents.calendar")
+sys.modules["app.agents.calendar"] = _calendar_agent_module
+try:
+    from app.api.v1 import calendar as calendar_api
+finally:
+    if _real_calendar_agent_module is None:
+        del sys.modules["app.agents.calendar"]
+    else:
+        sys.modules["app.agents.calendar"] = _real_calendar_agent_module
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on a throwaway SQLite database with the users and meetings tables"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'calendar.db'}")
+    Base.metadata.create_all(engine, tables=[User.__table__, Meeting.__table__])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def user():
+    return SimpleNamespace(id=1)
+
+
+def _add_meetings(db, count, user_id=1, workflow_id="wf-1", status="scheduled"):
+    """Insert meetings created one minute apart, oldest first"""
+    start = datetime(2026, 5, 1, 9, 0)
+    meetings = [
+        Meeting(
+            workflow_id=workflow_id,
+            user_id=user_id,
+            prospect_name=f"Prospect {i}",
+            prospect_email=f"prospect{i}@acme.com",
+            title=f"Meeting {i}",
+            meeting_type="consultation",
+            scheduled_at=start + timedelta(days=i),
+            status=status,
+            created_at=start + timedelta(minutes=i),
+            updated_at=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    db.add_all(meetings)
+    db.commit()
+    return meetings
+
+
+class TestGetAllMeetings:
+    """Test cases for the paged meeting list"""
+
+    def test_page_carries_full_total(self, db, user):
+        """Test that the total counts every match, not just the page"""
+        _add_meetings(db, 3)
+        _add_meetings(db, 2, user_id=2)
+
+        result = calendar_api.get_all_meetings(limit=2, offset=0, status=None, db=db, current_user=user)
+
+        assert result["total"] == 3
+        assert len(result["meetings"]) == 2
+        assert all(meeting.user_id == 1 for meeting in result["meetings"])
+
+    def test_page_past_the_end_still_reports_total(self, db, user):
+        """Test that an empty page past the end counts the matches separately"""
+        _add_meetings(db, 3)
+
+        result = calendar_api.get_all_meetings(limit=2, offset=5, status=None, db=db, current_user=user)
+
+        assert result["meetings"] == []
+        assert result["total"] == 3
+
+    def test_no_meetings(self, db, user):
+        """Test that a user without meetings gets an empty first page"""
+        result = calendar_api.get_all_meetings(limit=2, offset=0, status=None, db=db, current_user=user)
+
+        assert result["meetings"] == []
+        assert result["total"] == 0
+
+    def test_status_filter_applies_to_total(self, db, user):
+        """Test that the total only counts meetings with the requested status"""
+        _add_meetings(db, 2)
+        _add_meetings(db, 1, status="cancelled")
+
+        result = calendar_api.get_all_meetings(limit=10, offset=0, status="cancelled", db=db, current_user=user)
+
+        assert result["total"] == 1
+        assert [meeting.status for meeting in result["meetings"]] == ["cancelled"]
+
+
+class TestGetCalendarStatus:
+    """Test cases for the workflow calendar status"""
+
+    def test_counts_and_returns_latest_meeting(self, db, user):
+        """Test that the status counts the workflow's meetings and returns the newest"""
+        meetings = _add_meetings(db, 3)
+        _add_meetings(db, 2, workflow_id="wf-2")
+        _add_meetings(db, 1, user_id=2)
+
+        with patch.object(calendar_api, "persistence_manager") as persistence:
+            persistence.load_state.return_value = {"meeting_response": {"status": "accepted"}}
+            status = calendar_api.get_calendar_status("wf-1", db=db, current_user=user)
+
+        assert status["scheduled_meeting_count"] == 3
+        assert status["latest_meeting"].id == meetings[-1].id
+        assert status["can_schedule_meeting"] is True
+
+    def test_workflow_without_meetings(self, db, user):
+        """Test that no meeting is looked up when the workflow has none"""
+        with patch.object(calendar_api, "persistence_manager") as persistence:
+            persistence.load_state.return_value = {"meeting_response": {}}
+            status = calendar_api.get_calendar_status("wf-1", db=db, current_user=user)
+
+        assert status["scheduled_meeting_count"] == 0
+        assert status["latest_meeting"] is None
+
+
+class TestScheduleMeeting:
+    """Test cases for scheduling a meeting and finishing up in the background"""
+
+    MEETING_DETAILS = {
+        "prospect_name": "Jane Doe",
+        "prospect_email": "jane@acme.com",
+        "title": "Planning call",
+        "description": "Kickoff",
+        "start_time": "2026-05-04T10:00:00",
+        "end_time": "2026-05-04T10:45:00",
+        "google_meet_link": "https://meet.google.com/abc",
+    }
+
+    @pytest.mark.asyncio
+    async def test_response_does_not_wait_for_finalize(self, db, user):
+        """Test that the meeting is stored and the state update is left to a background task"""
+        state = {"workflow_id": "wf-1"}
+        background_tasks = BackgroundTasks()
+
+        with patch.object(calendar_api, "persistence_manager") as persistence, \
+                patch.object(calendar_api, "calendar_agent") as agent:
+            persistence.load_state.return_value = state
+            agent.schedule_google_meet = AsyncMock(return_value={
+                "status": "success", "meeting_details": self.MEETING_DETAILS, "invitation_sent": True
+            })
+            result = await calendar_api.schedule_meeting("wf-1", background_tasks, {}, db=db, current_user=user)
+
+        stored = db.get(Meeting, result["meeting_id"])
+        assert result["status"] == "success"
+        assert stored.duration_minutes == 45
+        assert stored.scheduled_at.replace(tzinfo=None) == datetime(2026, 5, 4, 10, 0)
+        persistence.save_state.assert_not_called()
+
+        [task] = background_tasks.tasks
+        assert task.func is calendar_api._finalize_schedule
+        assert task.args == ("wf-1", result["meeting_id"], self.MEETING_DETAILS, state)
+
+    @pytest.mark.asyncio
+    async def test_finalize_updates_state_and_campaign(self):
+        """Test that the background step saves the state and completes the campaign"""
+        execution_state = {"workflow_id": "wf-1", "status": "executing", "metrics": {"meetings_scheduled": 1}}
+        coordinator = MagicMock()
+        coordinator.find_plan_for_workflow.return_value = "plan-1"
+        coordinator.executing_campaigns = {"plan-1": execution_state}
+        coordinator_module = ModuleType("app.agents.campaign_coordinator")
+        coordinator_module.get_global_coordinator = lambda: coordinator
+        state = {"workflow_id": "wf-1"}
+
+        with patch.object(calendar_api, "persistence_manager") as persistence, \
+                patch.dict(sys.modules, {"app.agents.campaign_coordinator": coordinator_module}):
+            await calendar_api._finalize_schedule("wf-1", 7, self.MEETING_DETAILS, state)
+
+        persistence.save_state.assert_called_once_with("wf-1", state)
+        assert state["scheduled_meeting"]["meeting_id"] == 7
+        assert state["scheduled_meeting"]["meeting_details"] == self.MEETING_DETAILS
+        coordinator.find_plan_for_workflow.assert_called_once_with("wf-1")
+        assert execution_state["status"] == "completed"
+        assert execution_state["current_phase"] == "execution_complete"
+        assert execution_state["metrics"]["meetings_scheduled"] == 2
+        coordinator.release_workflow.assert_called_once_with("wf-1")
+        coordinator._broadcast_status_update.assert_called_once_with("plan-1", execution_state, force=True)
+
+    @pytest.mark.asyncio
+    async def test_finalize_completes_campaign_when_save_fails(self):
+        """Test that a failed state save does not stop the campaign update"""
+        coordinator = MagicMock()
+        coordinator.find_plan_for_workflow.return_value = None
+        coordinator_module = ModuleType("app.agents.campaign_coordinator")
+        coordinator_module.get_global_coordinator = lambda: coordinator
+
+        with patch.object(calendar_api, "persistence_manager") as persistence, \
+                patch.dict(sys.modules, {"app.agents.campaign_coordinator": coordinator_module}):
+            persistence.save_state.side_effect = RuntimeError("database down")
+            await calendar_api._finalize_schedule("wf-1", 7, self.MEETING_DETAILS, {})
+
+        coordinator.find_plan_for_workflow.assert_called_once_with("wf-1")
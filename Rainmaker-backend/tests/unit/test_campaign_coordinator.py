@@ -0,0 +1,44 @@
+"""
+Unit tests for the Campaign Coordinator Agent
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents.campaign_coordinator import CampaignCoordinatorAgent
+
+
+@pytest.fixture
+def coordinator():
+    """Coordinator with one workflow running under plan-1"""
+    coordinator = CampaignCoordinatorAgent()
+    coordinator.executing_campaigns["plan-1"] = {
+        "plan_id": "plan-1",
+        "workflow_id": "wf-1",
+        "status": "executing",
+        "current_phase": "outreach",
+    }
+    coordinator._workflow_plans["wf-1"] = "plan-1"
+    return coordinator
+
+
+class TestWorkflowPlanIndex:
+    """Test cases for looking up a workflow's campaign plan"""
+
+    def test_running_workflow_is_found(self, coordinator):
+        """Test that a running workflow maps to its plan"""
+        assert coordinator.find_plan_for_workflow("wf-1") == "plan-1"
+        assert coordinator.find_plan_for_workflow("wf-2") is None
+
+    @pytest.mark.asyncio
+    async def test_completed_workflow_is_released(self, coordinator):
+        """Test that finishing a campaign drops its index entry but keeps its state"""
+        execution_state = coordinator.executing_campaigns["plan-1"]
+
+        await coordinator._execute_outreach_phase(SimpleNamespace(plan_id="plan-1"), execution_state)
+
+        assert execution_state["status"] == "completed"
+        assert coordinator._workflow_plans == {}
+        assert coordinator.find_plan_for_workflow("wf-1") is None
+        assert coordinator.executing_campaigns["plan-1"] is execution_state
@@ -0,0 +1,32 @@
+"""
+Unit tests for database session management
+"""
+
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.db import session
+
+
+class TestWarmPool:
+    """Test cases for filling the connection pool at startup"""
+
+    def test_opens_every_pool_slot(self, tmp_path):
+        """Test that each pooled connection is opened and returned to the pool"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'warm.db'}", poolclass=QueuePool, pool_size=4, max_overflow=0)
+
+        with patch.object(session, "engine", engine):
+            opened = session.warm_pool()
+
+        assert opened == 4
+        assert engine.pool.checkedin() == 4
+        assert engine.pool.checkedout() == 0
+
+    def test_skips_unpooled_engine(self, tmp_path):
+        """Test that an engine without a pool is left alone"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'warm.db'}", poolclass=NullPool)
+
+        with patch.object(session, "engine", engine):
+            assert session.warm_pool() == 0
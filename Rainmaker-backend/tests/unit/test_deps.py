@@ -0,0 +1,107 @@
+"""
+Unit tests for API dependencies
+"""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from unittest.mock import MagicMock, patch
+
+from app.api import deps
+from app.core.security import create_access_token
+from app.db.models import User
+
+
+def _credentials(email="jane@acme.com"):
+    """Bearer credentials for a valid token"""
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": email}))
+
+
+def _db_returning(user):
+    """Session mock whose user lookup returns the given user"""
+    db = MagicMock()
+    db.execute.return_value.scalar_one_or_none.return_value = user
+    return db
+
+
+class TestGetCurrentUser:
+    """Test cases for resolving the authenticated user"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty user cache"""
+        deps._USER_CACHE.clear()
+        deps._REJECTED_TOKENS.clear()
+        yield
+        deps._USER_CACHE.clear()
+        deps._REJECTED_TOKENS.clear()
+
+    def test_repeated_requests_hit_cache(self):
+        """Test that the user is looked up once across requests"""
+        user = User(email="jane@acme.com", is_active=True, role="sales_rep")
+        db = _db_returning(user)
+
+        first = deps.get_current_user(_credentials(), db)
+        second = deps.get_current_user(_credentials(), db)
+
+        assert first is second is user
+        db.execute.assert_called_once()
+        db.expunge.assert_called_once_with(user)
+
+    def test_missing_user_is_not_cached(self):
+        """Test that an unknown user is looked up again on the next request"""
+        db = _db_returning(None)
+
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc_info:
+                deps.get_current_user(_credentials(), db)
+            assert exc_info.value.detail == "User not found"
+
+        assert db.execute.call_count == 2
+
+    def test_inactive_cached_user_is_rejected(self):
+        """Test that is_active is checked even for cached users"""
+        user = User(email="jane@acme.com", is_active=True, role="sales_rep")
+        db = _db_returning(user)
+        deps.get_current_user(_credentials(), db)
+
+        user.is_active = False
+        with pytest.raises(HTTPException) as exc_info:
+            deps.get_current_user(_credentials(), db)
+
+        assert exc_info.value.detail == "Inactive user"
+
+    def test_token_without_subject_skips_lookup(self):
+        """Test that a token with an empty subject is refused before the query"""
+        db = _db_returning(None)
+
+        with pytest.raises(HTTPException) as exc_info:
+            deps.get_current_user(_credentials(email=""), db)
+
+        assert exc_info.value.status_code == 401
+        db.execute.assert_not_called()
+
+    def test_rejected_token_is_not_decoded_again(self):
+        """Test that a replayed bad token is refused from the negative cache"""
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-jwt")
+        db = _db_returning(None)
+
+        with patch.object(deps, "verify_token", wraps=deps.verify_token) as mock_verify:
+            for _ in range(3):
+                with pytest.raises(HTTPException) as exc_info:
+                    deps.get_current_user(credentials, db)
+                assert exc_info.value.status_code == 401
+                assert exc_info.value.headers == {"WWW-Authenticate": "Bearer"}
+
+        mock_verify.assert_called_once()
+        db.execute.assert_not_called()
+
+    def test_lookup_loads_only_needed_columns(self):
+        """Test that the user query skips the password hash and is limited to one row"""
+        db = _db_returning(User(email="jane@acme.com", is_active=True, role="sales_rep"))
+
+        deps.get_current_user(_credentials(), db)
+
+        sql = str(db.execute.call_args[0][0].compile(compile_kwargs={"literal_binds": True}))
+        assert "hashed_password" not in sql
+        assert "LIMIT 1" in sql
@@ -0,0 +1,188 @@
+"""
+Unit tests for the Enhanced Playwright MCP server
+"""
+
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.mcp.enhanced_playwright_mcp import EnhancedPlaywrightMCP
+
+
+class TestAsyncClose:
+    """Test cases for closing the browser from async code"""
+
+    @pytest.mark.asyncio
+    async def test_aclose_runs_on_browser_thread(self):
+        """Test that the browser is closed on the manager's executor thread"""
+        mcp = EnhancedPlaywrightMCP()
+        close_threads = []
+        mcp.browser_manager.close = MagicMock(side_effect=lambda: close_threads.append(threading.current_thread()))
+
+        async with mcp:
+            pass
+
+        mcp.browser_manager.close.assert_called_once()
+        assert close_threads[0] is not threading.main_thread()
+
+    @pytest.mark.asyncio
+    async def test_browser_calls_share_one_thread(self):
+        """Test that sync browser calls always run on the same executor thread"""
+        manager = EnhancedPlaywrightMCP().browser_manager
+
+        first = await manager.run_in_browser_thread(threading.get_ident)
+        second = await manager.run_in_browser_thread(threading.get_ident)
+
+        assert first == second != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_warmup_launches_browser_on_browser_thread(self):
+        """Test that warmup starts the shared browser on the manager's thread"""
+        mcp = EnhancedPlaywrightMCP()
+        launch_threads = []
+        mcp.browser_manager._ensure_browser_sync = MagicMock(
+            side_effect=lambda headless: launch_threads.append(threading.get_ident())
+        )
+
+        await mcp.warmup()
+
+        mcp.browser_manager._ensure_browser_sync.assert_called_once_with(False)
+        assert launch_threads == [await mcp.browser_manager.run_in_browser_thread(threading.get_ident)]
+
+    def test_close_resets_browser_handles(self):
+        """Test that a closed manager can be closed again safely"""
+        manager = EnhancedPlaywrightMCP().browser_manager
+        manager.browser = MagicMock()
+        manager.playwright = MagicMock()
+
+        manager.close()
+        manager.close()
+
+        assert manager.browser is None
+        assert manager.playwright is None
+
+    def test_close_continues_after_failure(self):
+        """Test that a failing step does not skip the rest of the teardown"""
+        manager = EnhancedPlaywrightMCP().browser_manager
+        manager.context = MagicMock()
+        manager.context.close.side_effect = RuntimeError("context gone")
+        browser = manager.browser = MagicMock()
+        browser.is_connected.return_value = False
+        playwright = manager.playwright = MagicMock()
+
+        manager.close()
+
+        browser.close.assert_not_called()
+        playwright.stop.assert_called_once()
+        assert manager.context is None
+        assert manager.browser is None
+
+
+class TestAbortNavigation:
+    """Test cases for stopping a navigation that outlived its caller"""
+
+    @pytest.mark.asyncio
+    async def test_abort_waits_for_running_navigation(self):
+        """Test that abort stops the running job and closes the browser once the thread is free"""
+        manager = EnhancedPlaywrightMCP().browser_manager
+        manager.close = MagicMock()
+        started = threading.Event()
+
+        def navigation():
+            started.set()
+            return manager.cancel_requested.wait(5)
+
+        job = asyncio.ensure_future(manager.run_in_browser_thread(navigation))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        await manager.abort_navigation()
+
+        assert job.done()
+        assert await job is True
+        manager.close.assert_called_once()
+        assert not manager.cancel_requested.is_set()
+
+    def test_cancelled_loop_takes_no_more_steps(self):
+        """Test that the navigation loop stops before the next step once cancelled"""
+        mcp = EnhancedPlaywrightMCP()
+        tool = mcp.navigate_extract_tool
+        mcp.browser_manager._capture_browser_step = MagicMock()
+        mcp.browser_manager.cancel_requested.set()
+
+        with patch.object(tool, "_extract_page_structure") as extract:
+            result = tool._ai_navigation_loop(MagicMock(url="https://example.com"), "goal")
+
+        extract.assert_not_called()
+        assert result["success"] is False
+        assert result["steps_taken"] == 0
+
+
+class TestNavigateExtractPayload:
+    """Test cases for the navigate_and_extract tool payload"""
+
+    @pytest.mark.asyncio
+    async def test_result_is_compact_json(self):
+        """Test that the tool result is serialized without indentation"""
+        mcp = EnhancedPlaywrightMCP()
+        mcp.browser_manager.create_page = MagicMock()
+        mcp.browser_manager._capture_browser_step = MagicMock()
+        result_data = {"success": True, "extracted_data": [{"name": "Jane", "email": "jane@acme.com"}]}
+
+        with patch.object(mcp.navigate_extract_tool, "_ai_navigation_loop", return_value=result_data):
+            result = await mcp.call_tool("navigate_and_extract", {"url": "https://example.com"})
+
+        assert not result.isError
+        assert json.loads(result.content[0].text) == result_data
+        assert "\n" not in result.content[0].text
+        assert ", " not in result.content[0].text
+
+    def test_viewer_screenshot_is_jpeg(self):
+        """Test that viewer frames carry a JPEG screenshot"""
+        frames = []
+        manager = EnhancedPlaywrightMCP().browser_manager
+        manager.browser_viewer_callback = frames.append
+        page = MagicMock()
+        page.screenshot.return_value = b"\xff\xd8jpeg"
+        page.url = "https://example.com"
+
+        manager._capture_browser_step(page, "Navigating")
+
+        assert page.screenshot.call_args.kwargs["type"] == "jpeg"
+        assert frames[0]["screenshot"] == "/9hqcGVn"
+
+
+class TestStateFileListing:
+    """Test cases for listing saved browser state files"""
+
+    def test_listing_is_reused_until_directory_changes(self, tmp_path):
+        """Test that the state directory is only re-read after it changes"""
+        manager = EnhancedPlaywrightMCP().browser_manager
+        manager.state_dir = str(tmp_path)
+        (tmp_path / "nav_1_linkedin_state.json").write_text("{}")
+
+        with patch("app.mcp.browser_manager.os.listdir", wraps=os.listdir) as listdir:
+            assert manager.list_state_files("nav_1") == ["nav_1_linkedin_state.json"]
+            assert manager.list_state_files("nav_1") == ["nav_1_linkedin_state.json"]
+            assert listdir.call_count == 1
+
+            (tmp_path / "nav_2_linkedin_state.json").write_text("{}")
+            os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1))
+            assert manager.list_state_files("nav_2") == ["nav_2_linkedin_state.json"]
+            assert listdir.call_count == 2
+
+    def test_save_invalidates_listing(self, tmp_path):
+        """Test that saving state forces the next listing to re-read the directory"""
+        manager = EnhancedPlaywrightMCP().browser_manager
+        manager.state_dir = str(tmp_path)
+        manager.context = MagicMock()
+        manager.context.storage_state.return_value = {}
+        (tmp_path / "nav_1_linkedin_state.json").write_text("{}")
+        # Listing taken before the file appeared, with an unchanged directory mtime
+        manager._state_listing = (os.stat(tmp_path).st_mtime_ns, ())
+
+        manager.save_browser_state("nav_1", "linkedin")
+
+        assert manager.list_state_files("nav_1") == ["nav_1_linkedin_state.json"]
@@ -0,0 +1,144 @@
+"""
+Unit tests for workflow state persistence
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.core import persistence
+from app.core.persistence import StatePersistence
+
+
+@pytest.fixture(autouse=True)
+def empty_state_cache():
+    persistence._STATE_DATA_CACHE.clear()
+    persistence._INFLIGHT_LOADS.clear()
+    yield
+    persistence._STATE_DATA_CACHE.clear()
+    persistence._INFLIGHT_LOADS.clear()
+
+
+def _session_returning(state_data):
+    """SessionLocal mock whose state query returns the given serialized state"""
+    db = MagicMock()
+    db.execute.return_value.fetchone.return_value = (state_data,) if state_data is not None else None
+    session_local = MagicMock()
+    session_local.return_value.__enter__.return_value = db
+    return session_local, db
+
+
+def _manager():
+    manager = StatePersistence()
+    manager._table_ensured = True
+    return manager
+
+
+class TestStateCache:
+    """Test cases for caching loaded workflow states"""
+
+    def test_repeated_loads_query_once(self):
+        """Test that a second load is served without querying the database"""
+        session_local, db = _session_returning('{"workflow_id": "wf-1"}')
+
+        with patch.object(persistence, "SessionLocal", session_local), \
+                patch.object(persistence.StateManager, "deserialize_state", side_effect=lambda data: {"raw": data}):
+            first = _manager().load_state("wf-1")
+            second = _manager().load_state("wf-1")
+
+        assert db.execute.call_count == 1
+        assert first == second
+        assert first is not second
+
+    def test_missing_state_is_not_cached(self):
+        """Test that a workflow without a saved state is looked up again next time"""
+        session_local, db = _session_returning(None)
+
+        with patch.object(persistence, "SessionLocal", session_local):
+            assert _manager().load_state("wf-1") is None
+            assert _manager().load_state("wf-1") is None
+
+        assert db.execute.call_count == 2
+
+    def test_save_invalidates_cached_state(self):
+        """Test that saving a workflow makes the next load read the database again"""
+        persistence._STATE_DATA_CACHE["wf-1"] = '{"stale": true}'
+        session_local, db = _session_returning('{"fresh": true}')
+
+        with patch.object(persistence, "SessionLocal", session_local), \
+                patch.object(persistence.StateManager, "clean_state_for_persistence", side_effect=lambda state: state), \
+                patch.object(persistence.StateManager, "serialize_state", return_value="{}"), \
+                patch.object(persistence.StateManager, "deserialize_state", side_effect=lambda data: {"raw": data}):
+            assert _manager().save_state("wf-1", {"current_stage": "hunting"})
+            state = _manager().load_state("wf-1")
+
+        assert state == {"raw": '{"fresh": true}'}
+
+    def test_load_racing_a_save_is_not_cached(self):
+        """Test that a row read before a concurrent save is not kept in the cache"""
+        session_local, db = _session_returning('{"old": true}')
+        db.execute.side_effect = lambda *args, **kwargs: (
+            persistence._invalidate_cached_state("wf-1"), db.execute.return_value
+        )[1]
+
+        with patch.object(persistence, "SessionLocal", session_local), \
+                patch.object(persistence.StateManager, "deserialize_state", side_effect=lambda data: {"raw": data}):
+            _manager().load_state("wf-1")
+
+        assert "wf-1" not in persistence._STATE_DATA_CACHE
+
+
+class TestConcurrentLoads:
+    """Test cases for coalescing parallel loads of the same workflow"""
+
+    def _blocking_session(self, state_data, release):
+        """SessionLocal mock whose query waits until released"""
+        session_local, db = _session_returning(state_data)
+        result = db.execute.return_value
+        db.execute.side_effect = lambda *args, **kwargs: (release.wait(timeout=5), result)[1]
+        return session_local, db
+
+    def test_parallel_loads_share_one_query(self):
+        """Test that loads arriving while a read is in flight wait for it"""
+        release = threading.Event()
+        session_local, db = self._blocking_session('{"workflow_id": "wf-1"}', release)
+
+        with patch.object(persistence, "SessionLocal", session_local), \
+                patch.object(persistence.StateManager, "deserialize_state", side_effect=lambda data: {"raw": data}), \
+                ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(_manager().load_state, "wf-1") for _ in range(4)]
+            while "wf-1" not in persistence._INFLIGHT_LOADS:
+                pass
+            release.set()
+            states = [future.result(timeout=5) for future in futures]
+
+        assert db.execute.call_count == 1
+        assert all(state == {"raw": '{"workflow_id": "wf-1"}'} for state in states)
+        assert persistence._INFLIGHT_LOADS == {}
+
+    def test_save_detaches_inflight_load(self):
+        """Test that a load started after a save does not join the older read"""
+        persistence._INFLIGHT_LOADS["wf-1"] = stale = persistence.Future()
+        session_local, db = _session_returning('{"fresh": true}')
+
+        persistence._invalidate_cached_state("wf-1")
+        with patch.object(persistence, "SessionLocal", session_local), \
+                patch.object(persistence.StateManager, "deserialize_state", side_effect=lambda data: {"raw": data}):
+            state = _manager().load_state("wf-1")
+
+        assert state == {"raw": '{"fresh": true}'}
+        assert not stale.done()
+
+    def test_failed_read_reaches_waiters(self):
+        """Test that callers waiting on a failed read get None and the next load retries"""
+        session_local, db = _session_returning(None)
+        db.execute.side_effect = RuntimeError("connection lost")
+
+        with patch.object(persistence, "SessionLocal", session_local):
+            assert _manager().load_state("wf-1") is None
+            assert _manager().load_state("wf-1") is None
+
+        assert db.execute.call_count == 2
+        assert persistence._INFLIGHT_LOADS == {}
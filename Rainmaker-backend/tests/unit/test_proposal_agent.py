@@ -0,0 +1,321 @@
+"""
+Unit tests for the Proposal Agent
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.agents import proposal as proposal_module
+from app.agents.proposal import ProposalAgent
+
+# proposal.py imports its template module through the app/ path it registers
+from agents import proposal_template as template_module
+
+
+class TestAnalysisCache:
+    """Test cases for the Gemini analysis cache"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty analysis cache"""
+        proposal_module._ANALYSIS_CACHE.clear()
+        yield
+        proposal_module._ANALYSIS_CACHE.clear()
+
+    def test_cache_key_ignores_key_order(self):
+        """Test that equivalent raw data hashes to the same key"""
+        key_a = proposal_module._analysis_cache_key({"client_company": "Acme", "guest_count": 50})
+        key_b = proposal_module._analysis_cache_key({"guest_count": 50, "client_company": "Acme"})
+        key_c = proposal_module._analysis_cache_key({"guest_count": 51, "client_company": "Acme"})
+
+        assert key_a == key_b
+        assert key_a != key_c
+
+    @pytest.mark.asyncio
+    async def test_repeated_analysis_hits_cache(self):
+        """Test that the AI is only called once for identical raw data"""
+        analysis = {"event_type": "Gala", "guest_count": 80, "budget_estimate": 20000}
+        mock_service = AsyncMock()
+        mock_service.generate_json_response.return_value = analysis
+
+        with patch.object(proposal_module, "gemini_service", mock_service):
+            agent = ProposalAgent()
+            first = await agent._get_ai_analysis({"client_company": "Acme"})
+            second = await agent._get_ai_analysis({"client_company": "Acme"})
+
+        assert first == second == analysis
+        assert mock_service.generate_json_response.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_fallback_analysis_is_not_cached(self):
+        """Test that AI failures are retried instead of serving a cached fallback"""
+        mock_service = AsyncMock()
+        mock_service.generate_json_response.side_effect = RuntimeError("AI down")
+
+        with patch.object(proposal_module, "gemini_service", mock_service):
+            agent = ProposalAgent()
+            await agent._get_ai_analysis({"client_company": "Acme", "guest_count": 40})
+            await agent._get_ai_analysis({"client_company": "Acme", "guest_count": 40})
+
+        assert mock_service.generate_json_response.await_count == 2
+        assert len(proposal_module._ANALYSIS_CACHE) == 0
+
+
+class TestProposalRendering:
+    """Test cases for proposal HTML rendering"""
+
+    @pytest.fixture
+    def structured_data(self):
+        """Structured proposal data as produced by the AI processing step"""
+        return {
+            "proposal_id": "PROP_ACME_20250101_120000",
+            "client_company": "Acme & Co",
+            "event_type": "Holiday Party",
+            "event_vision": "A memorable celebration",
+            "key_requirements": ["Catering", "Photography"],
+            "guest_count": 120,
+            "budget_estimate": 30000,
+            "timeline": "8 weeks",
+            "packages": [
+                {"name": "Essential", "price": 19200, "price_fmt": "19,200", "per_person": 160, "description": "Basic", "features": ["Coordination"]},
+                {"name": "Signature", "price": 24000, "price_fmt": "24,000", "per_person": 200, "description": "Enhanced", "recommended": True, "features": ["Catering"]},
+                {"name": "Premium", "price": 31200, "price_fmt": "31,200", "per_person": 260, "description": "Luxury", "features": ["Videography"]},
+            ],
+            "total_investment": 24000,
+            "generated_date": "January 01, 2025",
+            "valid_until_date": "January 15, 2025",
+            "contact_info": {
+                "name": "Sarah Mitchell",
+                "title": "Senior Event Strategist",
+                "email": "sarah@rainmaker.events",
+                "phone": "(555) 123-4567"
+            }
+        }
+
+    @pytest.mark.asyncio
+    async def test_render_uses_shared_compiled_template(self, structured_data):
+        """Test that repeated renders reuse the module-level template"""
+        agent = ProposalAgent()
+
+        with patch.object(template_module._ENV, "compile") as mock_compile:
+            html = await agent._generate_modern_html_proposal(structured_data)
+
+        mock_compile.assert_not_called()
+        assert "@media print" in html
+        assert "Acme &amp; Co" in html
+        assert "$24,000" in html
+        assert "$4,800" in html  # 20% deposit line of the Signature package
+
+    @pytest.mark.asyncio
+    async def test_packages_carry_formatted_prices(self):
+        """Test that package prices are pre-formatted for the template"""
+        agent = ProposalAgent()
+
+        packages = await agent._generate_smart_packages({"guest_count": 100, "budget_estimate": 25000})
+
+        for package in packages:
+            assert package["price_fmt"] == f"{package['price']:,}"
+
+
+class TestPdfBrowserPool:
+    """Test cases for the pooled PDF browsers"""
+
+    @staticmethod
+    def _connected_slot(pool):
+        """Give the pool's first slot a fake running browser"""
+        slot = pool._slots[0]
+        slot.playwright = MagicMock()
+        slot.browser = MagicMock()
+        slot.browser.is_connected.return_value = True
+        slot.browser.new_context.side_effect = lambda: MagicMock()
+        return slot
+
+    @pytest.mark.asyncio
+    async def test_run_reuses_slot_page(self):
+        """Test that consecutive renders share a single browser and page"""
+        pool = proposal_module.PdfBrowserPool(size=1)
+        slot = self._connected_slot(pool)
+        fake_browser = slot.browser
+
+        first = await pool.run(lambda page, value: (page, value), 1)
+        second = await pool.run(lambda page, value: (page, value), 2)
+
+        assert first[0] is second[0]
+        assert (first[1], second[1]) == (1, 2)
+        assert fake_browser.new_context.call_count == 1
+        slot.playwright.chromium.launch.assert_not_called()
+
+        await pool.close()
+        fake_browser.close.assert_called_once()
+        assert slot.browser is None
+
+    @pytest.mark.asyncio
+    async def test_page_recycled_after_max_uses(self):
+        """Test that a slot opens a fresh page once the use limit is reached"""
+        pool = proposal_module.PdfBrowserPool(size=1)
+        slot = self._connected_slot(pool)
+
+        with patch.object(proposal_module, "_PDF_PAGE_MAX_USES", 2):
+            pages = [await pool.run(lambda page: page) for _ in range(3)]
+
+        assert pages[0] is pages[1]
+        assert pages[2] is not pages[0]
+        assert slot.browser.new_context.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_run_releases_slot_and_discards_page_on_error(self):
+        """Test that a failed render returns its slot and drops the possibly broken page"""
+        pool = proposal_module.PdfBrowserPool(size=1)
+        slot = self._connected_slot(pool)
+
+        def failing_render(page):
+            raise RuntimeError("render failed")
+
+        with pytest.raises(RuntimeError):
+            await pool.run(failing_render)
+
+        assert pool._queue().qsize() == 1
+        assert slot.page is None
+
+    @pytest.mark.asyncio
+    async def test_warmup_opens_page_and_starts_keepalive(self):
+        """Test that warmup opens the slot page and close stops the keepalive task"""
+        pool = proposal_module.PdfBrowserPool(size=2)
+        slot = self._connected_slot(pool)
+
+        await pool.warmup(keepalive_interval=3600)
+
+        assert slot.page is not None
+        assert slot.page_uses == 0
+        assert pool._keepalive_task is not None
+
+        task = pool._keepalive_task
+        await pool.close()
+        assert task.cancelled() or task.cancelling()
+
+
+    def test_health_check_pings_page(self):
+        """Test that the health check evaluates in the slot's page"""
+        slot = self._connected_slot(proposal_module.PdfBrowserPool(size=1))
+        page = slot.ensure_page()
+
+        slot.health_check()
+
+        page.evaluate.assert_called_once_with("1")
+        assert slot.page is page
+
+    def test_failed_health_check_discards_page(self):
+        """Test that a page that does not answer is dropped for the next render"""
+        slot = self._connected_slot(proposal_module.PdfBrowserPool(size=1))
+        slot.ensure_page().evaluate.side_effect = RuntimeError("Target closed")
+
+        with pytest.raises(RuntimeError):
+            slot.health_check()
+
+        assert slot.page is None
+
+
+class TestProposalBatch:
+    """Test cases for batch proposal generation"""
+
+    @pytest.mark.asyncio
+    async def test_generate_proposals_preserves_order(self):
+        """Test that batch results line up with their inputs"""
+        agent = ProposalAgent()
+
+        async def fake_generate(raw_data):
+            return {"status": "success", "client_company": raw_data["client_company"]}
+
+        with patch.object(agent, "generate_proposal", side_effect=fake_generate):
+            results = await agent.generate_proposals([
+                {"client_company": "Acme"},
+                {"client_company": "Globex"},
+            ])
+
+        assert [r["client_company"] for r in results] == ["Acme", "Globex"]
+
+
+    @pytest.mark.asyncio
+    async def test_generate_proposals_bounds_concurrency(self):
+        """Test that a batch never runs more proposals at once than the limit"""
+        agent = ProposalAgent()
+        running = []
+        peak = []
+
+        async def fake_generate(raw_data):
+            running.append(raw_data)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(raw_data)
+            return {"status": "success"}
+
+        with patch.object(proposal_module, "PROPOSAL_BATCH_CONCURRENCY", 2), \
+                patch.object(agent, "generate_proposal", side_effect=fake_generate):
+            results = await agent.generate_proposals([{"client_company": f"C{i}"} for i in range(6)])
+
+        assert len(results) == 6
+        assert max(peak) == 2
+
+    @pytest.mark.asyncio
+    async def test_same_client_gets_distinct_proposal_ids(self):
+        """Test that proposals for one client in the same second do not share an id"""
+        agent = ProposalAgent()
+
+        with patch.object(agent, "_get_ai_analysis", AsyncMock(return_value={})), \
+                patch.object(agent, "_generate_smart_packages", AsyncMock(return_value=[])):
+            first = await agent._ai_process_raw_data({"client_company": "Acme Corp"})
+            second = await agent._ai_process_raw_data({"client_company": "Acme Corp"})
+
+        assert first["proposal_id"].startswith("PROP_ACMECORP_")
+        assert first["proposal_id"] != second["proposal_id"]
+
+
+class TestPdfEngineSelection:
+    """Test cases for choosing the PDF rendering engine"""
+
+    @pytest.mark.asyncio
+    async def test_weasyprint_engine_skips_browser(self, tmp_path):
+        """Test that the WeasyPrint engine renders without touching the browser pool"""
+        agent = ProposalAgent()
+        agent.output_dir = tmp_path
+
+        with patch.object(proposal_module, "PDF_ENGINE", "weasyprint"), \
+             patch.object(proposal_module, "WEASYPRINT_AVAILABLE", True), \
+             patch.object(proposal_module, "_render_pdf_weasyprint", return_value=b"%PDF-weasy") as mock_render, \
+             patch.object(proposal_module.pdf_browser_pool, "run", new_callable=AsyncMock) as mock_pool_run:
+            pdf_path, pdf_bytes = await agent._convert_to_pdf("<html></html>", {"proposal_id": "PROP_TEST"})
+
+        mock_render.assert_called_once_with("<html></html>")
+        mock_pool_run.assert_not_called()
+        assert pdf_bytes == b"%PDF-weasy"
+        assert pdf_path.read_bytes() == b"%PDF-weasy"
+
+    @pytest.mark.asyncio
+    async def test_playwright_engine_uses_browser_pool(self, tmp_path):
+        """Test that the Playwright engine renders on the pooled browsers"""
+        agent = ProposalAgent()
+        agent.output_dir = tmp_path
+
+        with patch.object(proposal_module, "PDF_ENGINE", "playwright"), \
+             patch.object(proposal_module.pdf_browser_pool, "run", new_callable=AsyncMock) as mock_pool_run:
+            mock_pool_run.return_value = b"%PDF-chromium"
+            pdf_path, pdf_bytes = await agent._convert_to_pdf("<html></html>", {"proposal_id": "PROP_TEST"})
+
+        mock_pool_run.assert_awaited_once_with(proposal_module._render_pdf, "<html></html>")
+        assert pdf_bytes == b"%PDF-chromium"
+        assert pdf_path.read_bytes() == b"%PDF-chromium"
+
+    @pytest.mark.asyncio
+    async def test_warmup_skipped_for_weasyprint(self):
+        """Test that warmup does not launch Chromium when WeasyPrint renders PDFs"""
+        agent = ProposalAgent()
+
+        with patch.object(proposal_module, "PDF_ENGINE", "weasyprint"), \
+             patch.object(proposal_module, "WEASYPRINT_AVAILABLE", True), \
+             patch.object(proposal_module.pdf_browser_pool, "warmup", new_callable=AsyncMock) as mock_warmup:
+            await agent.warmup()
+
+        mock_warmup.assert_not_called()
+
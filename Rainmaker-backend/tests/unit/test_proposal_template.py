@@ -0,0 +1,245 @@
+"""
+Unit tests for the proposal template module
+"""
+
+from unittest.mock import patch
+
+from app.agents import proposal  # noqa: F401  registers the app/ import path
+from agents import proposal_template as template_module
+
+
+def _packages():
+    """Minimal three-tier package list the body template expects"""
+    return [
+        {"name": name, "price": 1000, "price_fmt": "1,000", "per_person": 10, "features": []}
+        for name in ("Essential", "Signature", "Premium")
+    ]
+
+
+class TestCssMinification:
+    """Test cases for inline CSS minification"""
+
+    def test_minify_css_strips_comments_and_whitespace(self):
+        """Test that comments and insignificant whitespace are removed"""
+        css = """
+        /* Header */
+        .header {
+            display: flex;
+            font-family: -apple-system, 'Segoe UI', sans-serif;
+        }
+        """
+
+        assert template_module.minify_css(css) == (
+            ".header{display:flex;font-family:-apple-system,'Segoe UI',sans-serif}"
+        )
+
+    def test_compiled_template_has_minified_styles(self):
+        """Test that the compiled template source carries the minified CSS"""
+        source, _, _ = template_module._ENV.loader.get_source(template_module._ENV, "proposal_shell.html")
+        style = source[source.index("<style>"):source.index("</style>")]
+
+        assert "/*" not in style
+        assert "\n" not in style
+
+
+class TestInvestmentBreakdown:
+    """Test cases for the precomputed investment breakdown"""
+
+    def test_breakdown_matches_split(self):
+        """Test that each line is its share of the total"""
+        breakdown = template_module.investment_breakdown(24000)
+
+        assert breakdown == {
+            "coordination": "4,800",
+            "venue": "6,000",
+            "catering": "8,400",
+            "av_entertainment": "3,600",
+            "photography": "1,200",
+        }
+
+    def test_breakdown_sums_to_total(self):
+        """Test that truncation on the individual lines does not lose dollars"""
+        breakdown = template_module.investment_breakdown(24999)
+
+        total = sum(int(amount.replace(",", "")) for amount in breakdown.values())
+        assert total == 24999
+
+
+class TestShellSplit:
+    """Test cases for the pre-rendered static shell"""
+
+    def test_render_wraps_body_in_static_shell(self):
+        """Test that the rendered document has the shell, escaped title and body"""
+        html = template_module.render_proposal({
+            "client_company": "Acme & Co",
+            "key_requirements": [],
+            "packages": _packages(),
+            "contact_info": {},
+        })
+
+        assert html.startswith("<!DOCTYPE html>")
+        assert "<title>Event Proposal - Acme &amp; Co</title>" in html
+        assert '<div class="page">' in html
+        assert html.rstrip().endswith("</html>")
+        assert "__PROPOSAL_" not in html
+
+
+class TestThousands:
+    """Test cases for formatting money amounts"""
+
+    def test_thousands_formats_whole_amounts(self):
+        """Test grouping and truncation of money amounts"""
+        assert template_module.thousands(1234567) == "1,234,567"
+        assert template_module.thousands(1300.9) == "1,300"
+
+
+class TestPreEscape:
+    """Test cases for escaping the render context up front"""
+
+    def test_pre_escape_walks_nested_values(self):
+        """Test that nested strings are escaped and numbers are untouched"""
+        escaped = template_module._pre_escape({
+            "client_company": "<Acme>",
+            "guest_count": 120,
+            "packages": [{"name": "A & B", "price": 1000}],
+        })
+
+        assert escaped["client_company"] == "&lt;Acme&gt;"
+        assert escaped["guest_count"] == 120
+        assert escaped["packages"][0] == {"name": "A &amp; B", "price": 1000}
+
+    def test_render_does_not_double_escape(self):
+        """Test that pre-escaped values are emitted escaped exactly once"""
+        html = template_module.BODY_TEMPLATE.render(template_module._pre_escape({
+            "client_company": "Tom & Jerry",
+            "event_type": "<Gala>",
+            "key_requirements": [],
+            "packages": _packages(),
+            "contact_info": {},
+            "investment": {},
+        }))
+
+        assert "Tom &amp; Jerry" in html
+        assert "&lt;Gala&gt;" in html
+        assert "&amp;amp;" not in html
+
+
+class TestFragments:
+    """Test cases for the pre-rendered requirement and package cards"""
+
+    def test_packages_html_marks_recommended_and_keeps_escaping(self):
+        """Test the package cards built from an escaped context"""
+        packages = template_module._pre_escape([
+            {"name": "Essential", "description": "Basic", "price_fmt": "1,000", "per_person": 1500, "features": ["A & B"]},
+            {"name": "Signature", "description": "Better", "price_fmt": "2,000", "per_person": 20, "recommended": True, "features": []},
+        ])
+
+        html = template_module._packages_html(packages)
+
+        assert '<div class="package"><div class="package-name">Essential</div>' in html
+        assert '<div class="package recommended"><div class="package-name">Signature</div>' in html
+        assert "<li>A &amp; B</li>" in html
+        assert "$1,500 per person" in html
+
+    def test_render_includes_requirement_cards(self):
+        """Test that requirements reach the rendered document"""
+        html = template_module.render_proposal({
+            "client_company": "Acme",
+            "key_requirements": ["Catering <premium>"],
+            "packages": _packages(),
+            "contact_info": {},
+        })
+
+        assert '<div class="requirement-title">Catering &lt;premium&gt;</div>' in html
+        assert html.count('<div class="package-name">') == 3
+
+
+class TestPrintCss:
+    """Test cases for dropping print-only CSS from the screen preview"""
+
+    def test_strip_print_css_removes_nested_block(self):
+        """Test that the whole @media print block is removed"""
+        css = ".a{color:red}@media print{.page{padding:0}.b{margin:0}}.c{color:blue}"
+
+        assert template_module.strip_print_css(css) == ".a{color:red}.c{color:blue}"
+
+    def test_html_target_omits_print_rules(self):
+        """Test that only the PDF document carries the print stylesheet"""
+        documents = template_module.render_proposal_targets({
+            "client_company": "Acme",
+            "key_requirements": [],
+            "packages": _packages(),
+            "contact_info": {},
+        })
+
+        assert "@media print" in documents["pdf"]
+        assert "@media print" not in documents["html"]
+        assert len(documents["html"]) < len(documents["pdf"])
+
+
+class TestRenderCache:
+    """Test cases for memoized proposal rendering"""
+
+    def _context(self, company="Acme"):
+        return {
+            "client_company": company,
+            "key_requirements": ["Catering"],
+            "packages": _packages(),
+            "contact_info": {},
+        }
+
+    def test_identical_context_skips_rendering(self):
+        """Test that a repeated context is served from the cache"""
+        template_module._RENDER_CACHE.clear()
+        first = template_module.render_proposal_targets(self._context())
+
+        with patch.object(template_module, "BODY_TEMPLATE") as mock_body:
+            second = template_module.render_proposal_targets(self._context())
+
+        mock_body.render.assert_not_called()
+        assert first == second
+
+    def test_changed_context_renders_again(self):
+        """Test that any context change produces a fresh render"""
+        template_module._RENDER_CACHE.clear()
+        first = template_module.render_proposal(self._context("Acme"))
+        second = template_module.render_proposal(self._context("Globex"))
+
+        assert "Globex" in second
+        assert first != second
+        assert len(template_module._RENDER_CACHE) == 2
+
+    def test_regenerated_proposal_reuses_render(self):
+        """Test that a new proposal_id and dates still hit the cache and reach the output"""
+        template_module._RENDER_CACHE.clear()
+        first = template_module.render_proposal_targets({
+            **self._context(), "proposal_id": "PROP_ACME_1", "generated_date": "May 01, 2026",
+            "valid_until_date": "May 15, 2026"
+        })
+
+        with patch.object(template_module, "BODY_TEMPLATE") as mock_body:
+            second = template_module.render_proposal_targets({
+                **self._context(), "proposal_id": "PROP_ACME_<2>", "generated_date": "May 02, 2026",
+                "valid_until_date": "May 16, 2026"
+            })
+
+        mock_body.render.assert_not_called()
+        assert "PROP_ACME_1" in first["pdf"] and "May 15, 2026" in first["pdf"]
+        for document in second.values():
+            assert "PROP_ACME_&lt;2&gt;" in document
+            assert "valid until May 16, 2026" in document
+            assert "__PROPOSAL_" not in document
+
+    def test_concurrent_renders_share_the_cache(self):
+        """Test that renders from several worker threads agree and leave one entry"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        template_module._RENDER_CACHE.clear()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(
+                lambda i: template_module.render_proposal({**self._context(), "proposal_id": f"P{i}"}),
+                range(32)
+            ))
+
+        assert all(f"P{i}<" in html for i, html in enumerate(results))
+        assert len(template_module._RENDER_CACHE) == 1
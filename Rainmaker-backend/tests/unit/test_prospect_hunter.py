@@ -0,0 +1,389 @@
+"""
+Unit tests for the Prospect Hunter Agent
+"""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.agents import prospect_hunter as hunter_module
+from app.agents.prospect_hunter import HuntingResults, ProspectHunterAgent
+from app.core.state import ProspectData, StateManager
+
+
+@pytest.fixture
+def agent():
+    """Fresh prospect hunter agent"""
+    return ProspectHunterAgent()
+
+
+class TestParseContactString:
+    """Test cases for parsing raw contact strings"""
+
+    def test_extracts_email_phone_and_name(self, agent):
+        """Test that the name is whatever remains around the matches"""
+        contact = agent._parse_contact_string("Jane Doe - jane@acme.com - +1 (555) 123-4567")
+
+        assert contact == {
+            "email": "jane@acme.com",
+            "phone": "+1 (555) 123-4567",
+            "name": "Jane Doe",
+        }
+
+    def test_name_between_matches(self, agent):
+        """Test that text on both sides of a match is kept"""
+        contact = agent._parse_contact_string("jane@acme.com Jane Doe")
+
+        assert contact["name"] == "Jane Doe"
+        assert contact["email"] == "jane@acme.com"
+
+    def test_requires_name_and_contact_method(self, agent):
+        """Test that strings without a name or contact method are rejected"""
+        assert agent._parse_contact_string("jane@acme.com") is None
+        assert agent._parse_contact_string("Jane Doe") is None
+
+    def test_patterns_are_precompiled(self):
+        """Test that the parser patterns are compiled at import time"""
+        assert hunter_module._EMAIL_RE.search("x a@b.io y").group(0) == "a@b.io"
+        assert hunter_module._PHONE_RE.search("call 555 123 4567").group(0).strip() == "555 123 4567"
+
+
+class TestExtractContacts:
+    """Test cases for extracting contacts from navigation results"""
+
+    def test_contact_strings_in_lists_are_parsed(self, agent):
+        """Test that only strings hinting at contact details are parsed"""
+        navigation_data = {
+            "extracted_data": [
+                {"results": ["Jane Doe - JANE@ACME.COM", "Bob Roe 555 123 4567", "Nothing useful here"]}
+            ]
+        }
+
+        contacts = agent._extract_contacts_from_navigation_data(navigation_data)
+
+        assert [contact["name"] for contact in contacts] == ["Jane Doe"]
+
+    def test_contacts_keep_document_order_across_nesting(self, agent):
+        """Test that nested wrappers and lists are walked in order"""
+        navigation_data = {
+            "extracted_data": [
+                {"extracted_data": {"name": "Ann", "email": "ann@a.com"}},
+                {"page": {"people": [{"name": "Bob", "phone": "555 123 4567"}, "Cy - cy@c.com"]}},
+                {"name": "Dee", "linkedin": "https://linkedin.com/in/dee", "extra": [{"name": "Ignored", "email": "x@x.com"}]},
+            ]
+        }
+
+        contacts = agent._extract_contacts_from_navigation_data(navigation_data)
+
+        assert [contact["name"] for contact in contacts] == ["Ann", "Bob", "Cy", "Dee"]
+
+    def test_duplicate_contacts_are_dropped(self, agent):
+        """Test that the same contact details found twice yield one contact"""
+        navigation_data = {
+            "extracted_data": [
+                {"name": "Jane Doe", "email": "Jane@Acme.com", "phone": "555 123 4567"},
+                {"people": ["Jane Doe jane@acme.com 555 123 4567"], "team": [{"name": "Bob", "email": "bob@acme.com"}]},
+                {"name": "Jane D.", "email": "jane@acme.com", "phone": "555-123-4567"},
+            ]
+        }
+
+        contacts = agent._extract_contacts_from_navigation_data(navigation_data)
+
+        assert [contact["name"] for contact in contacts] == ["Jane Doe", "Bob", "Jane D."]
+
+    def test_contact_hint_is_case_insensitive(self):
+        """Test the contact hint matches regardless of case"""
+        assert hunter_module._CONTACT_HINT_RE.search("Call PHONE desk")
+        assert hunter_module._CONTACT_HINT_RE.search("visit ACME.COM")
+        assert hunter_module._CONTACT_HINT_RE.search("no details") is None
+
+
+def _tool_result(payload, is_error=False):
+    """MCP tool result wrapping a JSON payload"""
+    return MagicMock(isError=is_error, content=[MagicMock(text=json.dumps(payload))])
+
+
+class TestHuntWithAiNavigation:
+    """Test cases for the AI navigation hunt"""
+
+    @pytest.mark.asyncio
+    async def test_sites_visited_counts_unique_urls(self, agent):
+        """Test that repeated step URLs count as one site"""
+        payload = {
+            "success": True,
+            "extracted_data": [],
+            "navigation_steps": [{"url": "https://a.com"}, {"url": "https://a.com"}, {"url": "https://b.com"}],
+        }
+        with patch.object(hunter_module, "enhanced_browser_mcp") as mock_mcp, \
+                patch.object(hunter_module, "set_workflow_id"):
+            mock_mcp.call_tool = AsyncMock(return_value=_tool_result(payload))
+            result = await agent._hunt_with_ai_navigation("wf-1", "find events")
+
+        assert result["sites_visited"] == 2
+        assert result["summary"] == "Visited 2 sites, found 0 contacts"
+        assert result["navigation_summary"] == payload["navigation_steps"]
+
+
+class TestNormalizeContactData:
+    """Test cases for normalizing raw contact dicts"""
+
+    def test_fallback_keys_are_used_in_order(self, agent):
+        """Test that the first non-empty raw key fills each field"""
+        contact = agent._normalize_contact_data({
+            "name": "",
+            "title": "Jane Doe",
+            "contact_email": "jane@acme.com",
+            "business_name": "Acme Events",
+            "city": "Austin",
+            "url": "https://acme.com",
+        })
+
+        assert contact == {
+            "name": "Jane Doe",
+            "email": "jane@acme.com",
+            "company": "Acme Events",
+            "location": "Austin",
+            "website": "https://acme.com",
+        }
+
+    def test_requires_contact_method(self, agent):
+        """Test that a name alone is not a usable contact"""
+        assert agent._normalize_contact_data({"name": "Jane Doe", "company": "Acme"}) is None
+
+    @pytest.mark.asyncio
+    async def test_results_are_not_printed(self, agent, capsys):
+        """Test that extraction details go to the debug log, not stdout"""
+        payload = {"success": True, "demo_mode": True, "extracted_data": [{"name": "Jane", "email": "jane@acme.com"}]}
+        with patch.object(hunter_module, "enhanced_browser_mcp") as mock_mcp, \
+                patch.object(hunter_module, "set_workflow_id"), \
+                patch.object(hunter_module, "logger") as mock_logger:
+            mock_logger.is_enabled_for.return_value = False
+            mock_mcp.call_tool = AsyncMock(return_value=_tool_result(payload))
+            result = await agent._hunt_with_ai_navigation("wf-1", "find events")
+
+        assert len(result["contacts"]) == 1
+        assert capsys.readouterr().out == ""
+        assert not any(call.args[0] == "👥 Extracted contacts" for call in mock_logger.debug.call_args_list)
+
+
+class TestHuntConcurrency:
+    """Test cases for bounding concurrent hunts"""
+
+    @pytest.fixture(autouse=True)
+    def reset_semaphore(self):
+        """Give every test a fresh hunt semaphore"""
+        hunter_module._hunt_semaphore = None
+        yield
+        hunter_module._hunt_semaphore = None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_hunts_are_bounded(self, agent):
+        """Test that no more than HUNT_CONCURRENCY navigations run at once"""
+        active = 0
+        peak = 0
+
+        async def navigate(*args, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return _tool_result({"success": True, "extracted_data": []})
+
+        with patch.object(hunter_module, "HUNT_CONCURRENCY", 2), \
+                patch.object(hunter_module, "enhanced_browser_mcp") as mock_mcp, \
+                patch.object(hunter_module, "set_workflow_id"):
+            mock_mcp.call_tool = AsyncMock(side_effect=navigate)
+            await asyncio.gather(*(agent._hunt_with_ai_navigation(f"wf-{i}", f"goal {i}") for i in range(5)))
+
+        assert mock_mcp.call_tool.await_count == 5
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_workflow_id_is_set_once_the_slot_is_taken(self, agent):
+        """Test that a queued hunt does not switch the viewer's workflow mid-navigation"""
+        current = {}
+        seen = []
+
+        async def navigate(name, arguments):
+            seen.append((arguments["extraction_goal"], current["workflow_id"]))
+            await asyncio.sleep(0.01)
+            seen.append((arguments["extraction_goal"], current["workflow_id"]))
+            return _tool_result({"success": True, "extracted_data": []})
+
+        with patch.object(hunter_module, "HUNT_CONCURRENCY", 1), \
+                patch.object(hunter_module, "enhanced_browser_mcp") as mock_mcp, \
+                patch.object(hunter_module, "set_workflow_id", side_effect=lambda wf: current.update(workflow_id=wf)):
+            mock_mcp.call_tool = AsyncMock(side_effect=navigate)
+            await asyncio.gather(
+                agent._hunt_with_ai_navigation("wf-1", "goal 1"),
+                agent._hunt_with_ai_navigation("wf-2", "goal 2"),
+            )
+
+        assert seen == [("goal 1", "wf-1"), ("goal 1", "wf-1"), ("goal 2", "wf-2"), ("goal 2", "wf-2")]
+
+
+class TestBuildSearchGoal:
+    """Test cases for building the AI search goal"""
+
+    def test_goal_includes_campaign_parameters(self, agent):
+        """Test that event types, location and profile feed the goal"""
+        goal = agent._build_search_goal(
+            ["wedding", "unknown"],
+            ["Austin", ""],
+            {"industries": ["tech", "finance", "retail", "energy"], "job_titles": ["CEO"], "company_sizes": ["mid-size"]}
+        )
+
+        assert "planning a wedding in Austin" in goal
+        assert "with titles like CEO in tech, finance, retail industries at mid-size companies" in goal
+        assert "energy" not in goal
+
+    def test_repeated_parameters_hit_cache(self, agent):
+        """Test that identical campaign parameters reuse the built goal"""
+        hunter_module._build_search_goal_cached.cache_clear()
+        profile = {"industries": ["tech"]}
+
+        first = agent._build_search_goal(["gala"], ["Denver"], profile)
+        second = agent._build_search_goal(["gala"], ["Denver"], dict(profile))
+
+        assert first is second
+        assert hunter_module._build_search_goal_cached.cache_info().hits == 1
+
+
+class TestPayloadParsing:
+    """Test cases for parsing MCP tool payloads"""
+
+    @pytest.mark.parametrize("orjson_available", [True, False])
+    def test_loads_with_and_without_orjson(self, orjson_available):
+        """Test that both parsers give the same result and error type"""
+        if orjson_available and not hunter_module.ORJSON_AVAILABLE:
+            pytest.skip("orjson not installed")
+
+        with patch.object(hunter_module, "ORJSON_AVAILABLE", orjson_available):
+            assert hunter_module._loads('{"contacts": [1, 2]}') == {"contacts": [1, 2]}
+            with pytest.raises(json.JSONDecodeError):
+                hunter_module._loads("not json")
+
+
+class TestHuntTimeout:
+    """Test cases for bounding a single navigation"""
+
+    @pytest.fixture(autouse=True)
+    def reset_semaphore(self):
+        """Give every test a fresh hunt semaphore"""
+        hunter_module._hunt_semaphore = None
+        yield
+        hunter_module._hunt_semaphore = None
+
+    @pytest.mark.asyncio
+    async def test_hung_navigation_fails_the_hunt(self, agent):
+        """Test that a navigation over the timeout returns a failed hunt and frees its slot"""
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        with patch.object(hunter_module, "HUNT_TIMEOUT_SECONDS", 0.01), \
+                patch.object(hunter_module, "enhanced_browser_mcp") as mock_mcp, \
+                patch.object(hunter_module, "set_workflow_id"):
+            mock_mcp.call_tool = AsyncMock(side_effect=hang)
+            mock_mcp.browser_manager.abort_navigation = AsyncMock()
+            result = await agent._hunt_with_ai_navigation("wf-1", "goal")
+
+        assert result["success"] is False
+        assert result["contacts"] == []
+        assert result["summary"].startswith("Hunt timed out")
+        mock_mcp.browser_manager.abort_navigation.assert_awaited_once()
+        assert not hunter_module._get_hunt_semaphore().locked()
+
+    @pytest.mark.asyncio
+    async def test_slot_is_held_until_browser_thread_is_free(self, agent):
+        """Test that a timed-out hunt keeps its slot while the navigation is being stopped"""
+        aborting = asyncio.Event()
+        release = asyncio.Event()
+
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        async def abort():
+            aborting.set()
+            await release.wait()
+
+        with patch.object(hunter_module, "HUNT_TIMEOUT_SECONDS", 0.01), \
+                patch.object(hunter_module, "enhanced_browser_mcp") as mock_mcp, \
+                patch.object(hunter_module, "set_workflow_id"):
+            mock_mcp.call_tool = AsyncMock(side_effect=hang)
+            mock_mcp.browser_manager.abort_navigation = AsyncMock(side_effect=abort)
+            hunt = asyncio.create_task(agent._hunt_with_ai_navigation("wf-1", "goal"))
+            await aborting.wait()
+
+            assert hunter_module._get_hunt_semaphore().locked()
+            release.set()
+            result = await hunt
+
+        assert result["summary"].startswith("Hunt timed out")
+        assert not hunter_module._get_hunt_semaphore().locked()
+
+
+class TestHuntingResults:
+    """Test cases for the hunting results stored in state"""
+
+    @pytest.fixture
+    def state(self):
+        """Initial workflow state"""
+        prospect = ProspectData(prospect_type="company", name="Acme", source="test")
+        return StateManager.create_initial_state(prospect_data=prospect, workflow_id="wf-1")
+
+    @pytest.mark.asyncio
+    async def test_hunt_records_results(self, agent, state):
+        """Test that a successful hunt stores results and raw data in state"""
+        contacts = [{"name": "Jane", "email": "jane@acme.com"}, {"name": "Bob", "phone": "555 123 4567"}]
+        prospects_data = {"contacts": contacts, "summary": "Visited 1 sites, found 2 contacts"}
+
+        with patch.object(agent, "_hunt_with_ai_navigation", AsyncMock(return_value=prospects_data)):
+            state = await agent.hunt_prospects(state)
+
+        results = state["hunter_results"]
+        assert results.prospects_found == 2
+        assert list(results.discovered_prospect_ids) == [0, 1]
+        assert state["raw_prospect_data"] is prospects_data
+        assert "hunting" in state["completed_stages"]
+
+    @pytest.mark.asyncio
+    async def test_locations_are_merged_in_order_without_duplicates(self, agent, state):
+        """Test that planner location fields are combined, stripped and deduplicated"""
+        state["geographic_focus"] = ["Austin", " Denver "]
+        state["geographic_location_to_search"] = "Austin"
+        state["geographic_regions"] = ["", "Denver", "  ", "Boston"]
+
+        with patch.object(agent, "_hunt_with_ai_navigation", AsyncMock(return_value={"contacts": []})), \
+                patch.object(agent, "_build_search_goal", wraps=agent._build_search_goal) as mock_goal:
+            await agent.hunt_prospects(state)
+
+        assert mock_goal.call_args[0][1] == ["Austin", "Denver", "Boston"]
+
+    def test_discovered_ids_serialize_as_list(self, state):
+        """Test that the lazy prospect id range persists as a JSON list"""
+        state["hunter_results"] = HuntingResults(
+            prospects_found=3,
+            discovered_prospect_ids=range(3),
+            confidence_score=0.8,
+            search_summary="found 3"
+        )
+
+        parsed = json.loads(StateManager.serialize_state(state))
+
+        assert parsed["hunter_results"]["discovered_prospect_ids"] == [0, 1, 2]
+
+    def test_results_are_slotted_and_frozen(self):
+        """Test that hunting results carry no per-instance __dict__ and are immutable"""
+        results = HuntingResults(
+            prospects_found=0,
+            discovered_prospect_ids=range(0),
+            confidence_score=0.2,
+            search_summary="none"
+        )
+
+        assert not hasattr(results, "__dict__")
+        with pytest.raises(AttributeError):
+            results.prospects_found = 1
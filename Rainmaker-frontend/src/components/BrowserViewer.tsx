@@ -167,7 +167,7 @@ export default function BrowserViewer({ workflowId, className = "", onStatusChan
       <div className="relative bg-white h-72">
         {screenshot ? (
           <img 
-            src={`data:image/png;base64,${screenshot}`}
+            src={`data:image/jpeg;base64,${screenshot}`}
             alt="Browser automation"
             className="w-full h-full object-contain bg-gray-50"
           />